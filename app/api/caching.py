@@ -0,0 +1,55 @@
+"""HTTP 条件请求
+
+强 ETag 由实体的 (id, created_at, updated_at) 或响应内容的哈希计算,客户端带 If-None-Match
+轮询时,只需查询版本列即可回答 304,不加载整行、也不序列化。
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+# 任务/配置会变化: 允许缓存,但每次使用前都要带 ETag 重新验证
+REVALIDATE = "private, no-cache"
+# 进程生命周期内不变的响应(如 /settings);包含连接串等信息,只允许私有缓存
+IMMUTABLE = "private, max-age=60"
+
+
+def make_etag(*parts) -> str:
+    """由若干部分计算强 ETag"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def version_etag(versions: Iterable[tuple], *extra) -> str:
+    """由 (id, created_at, updated_at) 版本元组计算 ETag,extra 区分同一数据的不同表示(如字段投影)"""
+    return make_etag(*extra, *(f"{entity_id}/{created_at}/{updated_at}" for entity_id, created_at, updated_at in versions))
+
+
+def entity_version(entity) -> tuple:
+    return entity.id, entity.created_at, entity.updated_at
+
+
+def requested_etags(request: Request) -> Optional[set[str]]:
+    """解析 If-None-Match,未携带时返回 None;按弱比较规则忽略 W/ 前缀"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    etags = requested_etags(request)
+    return etags is not None and ("*" in etags or etag in etags)
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = REVALIDATE) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -1,10 +1,10 @@
-from typing import Type
+from typing import Optional, Type
 from fastapi import Depends
 from app.core.database import Database
 from app.core.dependencies import Container
-from contextlib import contextmanager
 from sqlalchemy.orm import Session
 
+from app.repositories.base import LoaderStrategy
 from app.services.base import TBaseService
 
 def get_db() -> Database:
@@ -19,9 +19,12 @@ def get_db_session(
 
 def get_service(
     service_cls: Type[TBaseService],
+    loader_strategy: Optional[LoaderStrategy] = None,
 ):
+    """loader_strategy 为空时使用配置中的默认加载策略"""
     def _get_service(
-        db_session: Session = Depends(get_db_session),
+        db_session: Session = Depends(get_db_session, scope="function"),
+        db: Database = Depends(get_db),
     ):
-        return service_cls.create_instance(db_session)
+        return service_cls.create_instance(db_session, loader_strategy or db.loader_strategy)
     return Depends(_get_service)
\ No newline at end of file
@@ -1,7 +1,8 @@
-from contextlib import asynccontextmanager
+from contextlib import ExitStack, asynccontextmanager
 from logging import config
-import uvicorn
 from app.api.middleware import register_middleware
+from app.api.responses import register_exception_handlers
+from app.core.config import get_config
 from app.core.dependencies import Container
 from fastapi import FastAPI
 from app.api.routers import register_routers
@@ -12,10 +13,21 @@ def create_app() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
+        # SQLModel 元数据随模型一起注册,启动时才导入
+        from sqlmodel import SQLModel
+
         container = app.state.container
-        container.db().create_tables()
-        yield
-        container.db().drop_tables()
+        # schema 版本一致时只有一次主键查询;重启不再删表,数据得以保留
+        container.db().ensure_schema(SQLModel.metadata)
+        with ExitStack() as stack:
+            celery_config = container.config()["celery"]
+            if celery_config.get("worker_in_process"):
+                from app.worker.local import in_process_worker
+                stack.enter_context(in_process_worker(
+                    pool=celery_config.get("worker_pool", "threads"),
+                    concurrency=celery_config.get("worker_concurrency", 4),
+                ))
+            yield
 
     container = Container()
     api_settings = APISettings(**container.config()["api"])
@@ -27,13 +39,24 @@ def create_app() -> FastAPI:
     )
     app.state.container = container
     register_routers(app)
+    register_exception_handlers(app)
     register_middleware(app)
     return app
 
-fastapi_app = create_app()
+
+def __getattr__(name: str):
+    # fastapi_app 在第一次访问时才创建(如 uvicorn 加载 "app.api.main:fastapi_app"),
+    # 只导入本模块(如 python -m app.api.main 的 reload 监控进程)不会构建整个应用
+    if name == "fastapi_app":
+        globals()["fastapi_app"] = create_app()
+        return globals()["fastapi_app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    config = fastapi_app.state.container.config()["api"]
+    import uvicorn
+
+    config = get_config()["api"]
     uvicorn.run(
         "app.api.main:fastapi_app",
         host=config["host"],
@@ -1,22 +1,47 @@
 import time
 from fastapi import FastAPI, Request
 
+from app.core.metrics import REGISTRY
+from app.core.query_stats import track_queries
+
+# 未匹配到路由的请求统一归到一个标签下,避免任意 URL 造成标签爆炸
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, method and status",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ("method",),
+)
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
 def register_middleware(app: FastAPI):
-    async def add_process_time_header(request: Request, call_next):
+    async def record_request_metrics(request: Request, call_next):
+        method = request.method
+        REQUESTS_IN_FLIGHT.inc(method)
         start_time = time.perf_counter()
-        response = await call_next(request)
-        process_time = time.perf_counter() - start_time
-
-        # 根据处理时间的大小选择合适的单位
-        if process_time < 1e-3:
-            display_time = f"{process_time * 1e6:.2f} μs"
-        elif process_time < 1:
-            display_time = f"{process_time * 1e3:.2f} ms"
-        else:
-            display_time = f"{process_time:.2f} s"
+        status = 500
+        with track_queries() as query_stats:
+            try:
+                response = await call_next(request)
+                status = response.status_code
+            finally:
+                process_time = time.perf_counter() - start_time
+                REQUESTS_IN_FLIGHT.dec(method)
+                route = _route_template(request)
+                REQUEST_LATENCY.observe(process_time, method, route, str(status))
+                if query_stats.count:
+                    query_stats.log("request", f"{method} {route}")
 
         response.headers["X-Process-Time"] = str(process_time)
-        print(f"Process time: {display_time}")
+        response.headers["Server-Timing"] = f"app;dur={process_time * 1e3:.3f}, {query_stats.server_timing()}"
         return response
 
-    app.middleware("http")(add_process_time_header)
+    app.middleware("http")(record_request_metrics)
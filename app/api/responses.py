@@ -0,0 +1,46 @@
+from typing import Any, Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应,未安装 orjson 时退化为标准库 json"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def parse_fields(fields: Optional[str], schema_cls: type[BaseModel]) -> Optional[set[str]]:
+    """解析 ?fields=a,b 形式的字段投影,未知字段返回 400"""
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - set(schema_cls.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {sorted(unknown)}")
+    return selected
+
+def projected_response(data: Any, schema_cls: type[BaseModel], fields: set[str], many: bool = False) -> Response:
+    """只序列化请求的字段,直接由 pydantic-core 输出 JSON 字节"""
+    if many:
+        adapter = TypeAdapter(list[schema_cls])
+        content = adapter.dump_json(adapter.validate_python(data, from_attributes=True), include={"__all__": fields})
+    else:
+        content = schema_cls.model_validate(data, from_attributes=True).model_dump_json(include=fields)
+    return Response(content=content, media_type="application/json")
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """仓储中不存在的实体统一返回 404,而不是作为未处理的异常返回 500"""
+    from app.repositories.base import RepositoryNotFoundError
+
+    async def entity_not_found(request: Request, exc: RepositoryNotFoundError) -> JSONResponse:
+        return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+    app.add_exception_handler(RepositoryNotFoundError, entity_not_found)
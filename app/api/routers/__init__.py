@@ -1,13 +1,17 @@
 from fastapi import FastAPI
-from app.api.routers.settings import router as settings_router
-from app.api.routers.inference_sim_task import router as inference_sim_task_router
-from app.api.routers.model_config import router as model_config_router
 
 def register_routers(app: FastAPI) -> None:
+    # 路由模块(及其依赖的模型/服务)在创建应用时才导入
+    from app.api.routers.settings import router as settings_router
+    from app.api.routers.inference_sim_task import router as inference_sim_task_router
+    from app.api.routers.model_config import router as model_config_router
+    from app.api.routers.metrics import router as metrics_router
+
     routers = [
         settings_router, 
         inference_sim_task_router,
-        model_config_router
+        model_config_router,
+        metrics_router
     ]
     for router in routers:
         app.include_router(router)
\ No newline at end of file
@@ -1,8 +1,12 @@
-from typing import Type
-from fastapi import APIRouter, Depends
+import json
+from typing import Optional, Type
+from fastapi import APIRouter, Depends, Query, Request, Response
 from uuid import UUID
+from app.api.caching import entity_version, is_not_modified, make_etag, not_modified, set_cache_headers, version_etag
 from app.api.dependencies import get_service
+from app.api.responses import parse_fields, projected_response
 
+from app.repositories.base import LoaderStrategy
 from app.services.base import TBaseService
 
 class BaseApiRouter:
@@ -12,6 +16,8 @@ class BaseApiRouter:
     service_cls: Type[TBaseService]
     create_schema_cls = None
     public_schema_cls = None
+    # 关系加载策略,需要与 public_schema_cls 中包含的关系匹配;为空时使用配置中的默认值
+    loader_strategy: Optional[LoaderStrategy] = None
 
     def __init__(self):
         self.router = APIRouter(prefix=self.prefix, tags=self.tags)
@@ -19,11 +25,68 @@ class BaseApiRouter:
         public_schema_cls = self.public_schema_cls
         service_cls = self.service_cls
 
-        @self.router.post("/create")
-        def create(create_data: create_schema_cls, service: service_cls = get_service(self.service_cls)):
+        # 指定 response_model 后 FastAPI 直接由 pydantic-core 把 public_schema_cls 序列化为 JSON 字节,
+        # 只输出 schema 中声明的字段,不会经过 jsonable_encoder,也不会触发关系的懒加载
+        @self.router.post("/create", response_model=public_schema_cls)
+        def create(create_data: create_schema_cls, service: service_cls = self.get_service()):
             return service.create(create_data)
         
-        @self.router.post("/run/{sim_task_id}")
-        def run(sim_task_id: UUID, service: service_cls = get_service(self.service_cls)):
+        @self.router.post("/run/{sim_task_id}", response_model=public_schema_cls)
+        def run(sim_task_id: UUID, service: service_cls = self.get_service()):
             return service.run(sim_task_id)
 
+        # 表示形式(schema 定义)变化时 ETag 随之变化,避免发布新版本后命中旧的缓存
+        schema_tag = make_etag(json.dumps(public_schema_cls.model_json_schema(), sort_keys=True))
+
+        def representation(selected: Optional[set[str]], many: bool = False) -> tuple:
+            return schema_tag, "list" if many else "item", ",".join(sorted(selected)) if selected is not None else "*"
+
+        # 带 If-None-Match 的轮询先只查询版本列,未变化时直接 304;
+        # 200 的 ETag 由实际加载的实体计算,版本查询与加载之间的更新最多导致一次多余的传输
+        @self.router.get("/", response_model=list[public_schema_cls])
+        def get_all(
+            request: Request,
+            response: Response,
+            fields: Optional[str] = Query(None, description="逗号分隔的返回字段,默认返回全部字段"),
+            offset: int = Query(0, ge=0),
+            limit: Optional[int] = Query(None, ge=1),
+            service: service_cls = self.get_service(),
+        ):
+            selected = parse_fields(fields, public_schema_cls)
+            if request.headers.get("if-none-match"):
+                etag = version_etag(service.get_versions(offset=offset, limit=limit), *representation(selected, many=True))
+                if is_not_modified(request, etag):
+                    return not_modified(etag)
+            entities = service.get_all(offset=offset, limit=limit)
+            etag = version_etag(map(entity_version, entities), *representation(selected, many=True))
+            if selected is not None:
+                response = projected_response(entities, public_schema_cls, selected, many=True)
+                set_cache_headers(response, etag)
+                return response
+            set_cache_headers(response, etag)
+            return entities
+
+        @self.router.get("/{entity_id}", response_model=public_schema_cls)
+        def get_by_id(
+            entity_id: UUID,
+            request: Request,
+            response: Response,
+            fields: Optional[str] = Query(None, description="逗号分隔的返回字段,默认返回全部字段"),
+            service: service_cls = self.get_service(),
+        ):
+            selected = parse_fields(fields, public_schema_cls)
+            if request.headers.get("if-none-match"):
+                etag = version_etag([service.get_version(entity_id)], *representation(selected))
+                if is_not_modified(request, etag):
+                    return not_modified(etag)
+            entity = service.get_by_id(entity_id)
+            etag = version_etag([entity_version(entity)], *representation(selected))
+            if selected is not None:
+                response = projected_response(entity, public_schema_cls, selected)
+                set_cache_headers(response, etag)
+                return response
+            set_cache_headers(response, etag)
+            return entity
+
+    def get_service(self):
+        return get_service(self.service_cls, self.loader_strategy)
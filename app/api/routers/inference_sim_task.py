@@ -1,7 +1,7 @@
-from sqlalchemy import UUID
-from app.api.dependencies import get_service
+from uuid import UUID
 from app.api.routers.base import BaseApiRouter
-from app.domain.models import InferenceSimTaskCreate, InferenceSimTask
+from app.domain.models import InferenceSimTaskCreate, InferenceSimTaskDetail
+from app.repositories.base import LoaderStrategy
 from app.services.inference_sim_task import InferenceSimTaskService
 
 class InferenceSimTaskRouter(BaseApiRouter):
@@ -9,7 +9,23 @@ class InferenceSimTaskRouter(BaseApiRouter):
     tags = ["推理任务"]
     service_cls = InferenceSimTaskService
     create_schema_cls = InferenceSimTaskCreate
-    public_schema_cls = InferenceSimTask
+    public_schema_cls = InferenceSimTaskDetail
+    # 响应中包含三个配置,用 selectin 一次性加载,列表的查询次数与数量无关;
+    # 配置创建后不会再修改,ETag 只取任务行自身的版本
+    loader_strategy = LoaderStrategy.SELECTIN
+
+    def __init__(self):
+        super().__init__()
+        service_cls = self.service_cls
+        public_schema_cls = self.public_schema_cls
+
+        @self.router.post("/cancel/{sim_task_id}", response_model=public_schema_cls)
+        def cancel(sim_task_id: UUID, service: service_cls = self.get_service()):
+            return service.cancel(sim_task_id)
+
+        @self.router.post("/cancel", response_model=list[public_schema_cls])
+        def cancel_batch(sim_task_ids: list[UUID], service: service_cls = self.get_service()):
+            return service.cancel_batch(sim_task_ids)
 
 
 router = InferenceSimTaskRouter().router
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 
+from app.api.caching import IMMUTABLE, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.api.responses import FastJSONResponse
 from app.core.dependencies import Container
 
 router = APIRouter(
@@ -10,6 +12,20 @@ router = APIRouter(
 def get_container(request: Request) -> Container:
     return request.app.state.container
 
-@router.get("/")
-async def get_settings(container: Container = Depends(get_container)):
-    return container.config()
\ No newline at end of file
+def settings_response_cache(request: Request) -> tuple[bytes, str]:
+    """配置在进程生命周期内不变,第一次请求时序列化并缓存 (响应体, ETag)"""
+    cached = getattr(request.app.state, "settings_response", None)
+    if cached is None:
+        container = get_container(request)
+        body = FastJSONResponse(container.config()).body
+        cached = request.app.state.settings_response = (body, make_etag(body))
+    return cached
+
+@router.get("/", response_class=FastJSONResponse)
+async def get_settings(request: Request, cached: tuple[bytes, str] = Depends(settings_response_cache)):
+    body, etag = cached
+    if is_not_modified(request, etag):
+        return not_modified(etag, IMMUTABLE)
+    response = Response(content=body, media_type=FastJSONResponse.media_type)
+    set_cache_headers(response, etag, IMMUTABLE)
+    return response
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""配置加载
+
+config.yml 在第一次调用 get_config() 时才解析,并在进程内缓存;模块导入时不做任何 I/O,
+worker 子进程、CLI 与 `celery inspect ping` 健康检查只在真正需要配置时才付出解析成本。
+这里只依赖 PyYAML,不引入 dependency_injector/pydantic 等较重的依赖。
+"""
+
+import copy
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Any, Optional
+
+CONFIG_FILEPATH = Path(__file__).parent.parent.parent / "config.yml"
+
+# ${VAR} 必须存在;${VAR:default} 在环境变量缺失时使用默认值
+_ENV_MARKER = re.compile(r"\$\{(?P<name>[^}^{:]+)(?::(?P<default>[^}]*))?\}")
+
+_lock = threading.Lock()
+_config: Optional[dict] = None
+_overrides: list[dict] = []
+
+
+def _interpolate_env(text: str) -> str:
+    def replace(match: re.Match) -> str:
+        name, default = match.group("name"), match.group("default")
+        value = os.environ.get(name)
+        if value is not None:
+            return value
+        if default is not None:
+            return default
+        raise ValueError(f"Missing required environment variable \"{name}\"")
+    return _ENV_MARKER.sub(replace, text)
+
+
+def merge(base: dict, overrides: dict) -> dict:
+    """递归合并字典,overrides 中的值优先"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+    return base
+
+
+def apply_profile(config: dict) -> dict:
+    """用 profiles.<profile> 中的配置覆盖默认配置"""
+    profile = config.get("profile")
+    if not profile or profile == "default":
+        return config
+    profiles = config.get("profiles") or {}
+    if profile not in profiles:
+        raise ValueError(f"unknown profile: {profile}, must be one of {list(profiles)}")
+    return merge(config, profiles[profile])
+
+
+def load_config(filepath: Path = CONFIG_FILEPATH) -> dict:
+    import yaml
+
+    config = yaml.safe_load(_interpolate_env(Path(filepath).read_text(encoding="utf-8"))) or {}
+    return apply_profile(config)
+
+
+def get_config() -> dict[str, Any]:
+    """返回进程内缓存的配置,第一次调用时解析 config.yml"""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                config = load_config()
+                for overrides in _overrides:
+                    merge(config, overrides)
+                _config = config
+    return _config
+
+
+def override_config(overrides: dict) -> None:
+    """覆盖部分配置(压测/测试使用),在配置尚未加载时也会在加载后生效"""
+    with _lock:
+        _overrides.append(copy.deepcopy(overrides))
+        if _config is not None:
+            merge(_config, overrides)
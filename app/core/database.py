@@ -1,19 +1,82 @@
 from contextlib import contextmanager, AbstractContextManager
-from typing import Any, Callable, Generator
+from datetime import datetime, timezone
+import hashlib
+from typing import Any, Callable, Generator, Optional
 import logging
+import zlib
 
-from sqlalchemy import create_engine, orm
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, exc, inspect, orm, select, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
 # from app.domain.models import BaseSQLModel
+from app.core.query_stats import instrument_engine
 from app.core.settings import DatabaseSettings
 
 logger = logging.getLogger(__name__)
 
+# 记录当前 schema 版本的单行表,独立于业务模型的 metadata,不参与版本计算
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+_SCHEMA_VERSION_ROW_ID = 1
+# PostgreSQL 下多个副本同时启动时,只有持有该 advisory lock 的进程执行 DDL
+SCHEMA_LOCK_ID = zlib.crc32(b"schema_version")
+
+
+def _select_schema_version():
+    return select(schema_version_table.c.version).where(schema_version_table.c.id == _SCHEMA_VERSION_ROW_ID)
+
+
+def schema_digest(metadata: MetaData, dialect) -> str:
+    """按方言编译全部建表/建索引语句并取摘要,模型的表结构变化时摘要随之变化"""
+    statements = []
+    for table in metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip())
+    return hashlib.sha256("\n".join(statements).encode("utf-8")).hexdigest()
+
+
+class SchemaDriftError(RuntimeError):
+    """已存在的表缺少模型中的列,create_all 不会修改已存在的表,需要手动迁移"""
+
+    def __init__(self, missing: dict[str, list[str]]):
+        self.missing = missing
+        columns = ", ".join(f"{table}.{column}" for table, names in missing.items() for column in names)
+        super().__init__(f"database schema is missing columns: {columns}; apply the migration manually")
+
+
+def missing_columns(connection, metadata: MetaData) -> dict[str, list[str]]:
+    """已存在的表中缺少的列 {表名: [列名]},不存在的表由 create_all 建出,不计入"""
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        names = [column.name for column in table.columns if column.name not in existing_columns]
+        if names:
+            missing[table.name] = names
+    return missing
+
+
 class Database:
     def __init__(self, settings: DatabaseSettings) -> None:
         assert isinstance(settings, DatabaseSettings), f"settings must be DatabaseSettings, but got {type(settings)}"
-        self._engine = create_engine(settings.url, echo=True)
+        self.loader_strategy = settings.loader_strategy
+        connect_args = {}
+        if make_url(settings.url).get_backend_name() == "sqlite":
+            # local profile 下 API 线程池与进程内 worker 会跨线程共用连接
+            connect_args["check_same_thread"] = False
+        self._engine = create_engine(settings.url, echo=settings.echo, connect_args=connect_args)
+        instrument_engine(self._engine)
         self._session_factory = sessionmaker(
             autocommit=False,
             bind=self._engine,
@@ -25,6 +88,50 @@ class Database:
     def drop_tables(self, sqlmodels) -> None:
         sqlmodels.metadata.drop_all(self._engine)
 
+    def schema_version(self) -> Optional[str]:
+        """按主键读取已记录的 schema 版本,版本表不存在时返回 None"""
+        with self._engine.connect() as connection:
+            try:
+                return connection.execute(_select_schema_version()).scalar()
+            except (exc.OperationalError, exc.ProgrammingError):
+                return None
+
+    def ensure_schema(self, metadata: MetaData, version: Optional[str] = None) -> bool:
+        """保证数据库 schema 与 metadata 一致,返回是否执行了 DDL
+
+        版本一致时(绝大多数启动)只有一次主键查询;不一致时建出缺失的表与索引并记录新版本。
+        已存在的表缺少列时抛出 SchemaDriftError,不执行 DDL 也不记录版本,下次启动仍会检查;
+        列变更需要手动迁移。version 默认取 metadata 的 schema_digest。
+        """
+        version = version or schema_digest(metadata, self._engine.dialect)
+        if self.schema_version() == version:
+            return False
+
+        with self._engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                # 事务级锁,提交后自动释放;拿到锁后重新检查,其它副本可能已经完成升级
+                connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+            schema_version_table.create(connection, checkfirst=True)
+            current = connection.execute(_select_schema_version()).scalar()
+            if current == version:
+                return False
+            missing = missing_columns(connection, metadata)
+            if missing:
+                error = SchemaDriftError(missing)
+                logger.error(str(error))
+                raise error
+            metadata.create_all(connection)
+            values = {"version": version, "applied_at": datetime.now(timezone.utc)}
+            updated = connection.execute(
+                schema_version_table.update()
+                .where(schema_version_table.c.id == _SCHEMA_VERSION_ROW_ID)
+                .values(**values)
+            ).rowcount
+            if not updated:
+                connection.execute(schema_version_table.insert().values(id=_SCHEMA_VERSION_ROW_ID, **values))
+        logger.info(f"database schema upgraded from {current} to {version}")
+        return True
+
     @contextmanager
     def session(self) -> Generator[Session, Any, Any]:
         session: Session = self._session_factory()
@@ -41,21 +148,12 @@ class Database:
     @contextmanager
     def session_scope(self):
         """事务作用域上下文管理器"""
-        print("enter session_scope")
         session: Session = self._session_factory()
-        print("session created")
         try:
-            print("yied session")
             yield session
-            print("start commit session")
             session.commit()
-            print("commit session")
         except Exception:
-            print("rollback session")
             session.rollback()
-            print("rollback session done")
             raise
         finally:
-            print("start close session")
             session.close()
-            print("end close session")
\ No newline at end of file
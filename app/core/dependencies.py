@@ -1,26 +1,27 @@
 """Containers module."""
 
-from pathlib import Path
 from dependency_injector import containers, providers
 # # from app.api.fastapi import FastAPIApp
 # from pathlib import Path
 
+from app.core.config import get_config
 from app.core.settings import DatabaseSettings
 from app.core.database import Database
 # from app.repositories import TestRepository, UserRepository
 # from app.services import TestService, UserService
 
+def database_settings() -> DatabaseSettings:
+    return DatabaseSettings(**get_config()["db"])
+
 class Container(containers.DeclarativeContainer):
 
     # wiring_config = containers.WiringConfiguration(packages=["app.api"])
     wiring_config = containers.WiringConfiguration()
 
-    config = providers.Configuration(yaml_files=["config.yml"])
-    config_filepath = Path(__file__).parent.parent.parent / "config.yml"
-    config.from_yaml(filepath=config_filepath, required=True, envs_required=True)
-    config.set_yaml_files(["config.yml"])
+    # 配置在第一次调用 config() 时才解析 config.yml(见 app.core.config)
+    config = providers.Callable(get_config)
 
-    db = providers.Singleton(Database, settings=DatabaseSettings(**config.db()))
+    db = providers.Singleton(Database, settings=providers.Callable(database_settings))
 
     # db_session
     # db_session = providers.Factory(db.provided.session)
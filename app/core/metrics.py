@@ -0,0 +1,219 @@
+"""进程内指标
+
+低开销的计数器/仪表盘/直方图,每次记录只有一次加锁与若干整数运算,
+由 MetricsRegistry 统一以 Prometheus 文本格式导出。
+"""
+
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import threading
+from typing import Optional
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认的延迟分桶(秒)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type_name: str
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _check_labels(self, labelvalues):
+        assert len(labelvalues) == len(self.labelnames), \
+            f"{self.name} expects labels {self.labelnames}, but got {labelvalues}"
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._check_labels(labelvalues)
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._check_labels(labelvalues)
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float) -> None:
+        self._check_labels(labelvalues)
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def value(self, *labelvalues) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues) -> None:
+        self._check_labels(labelvalues)
+        # 每个标签组合: [各分桶计数..., +Inf 计数, 总和]
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self, *labelvalues) -> list[int]:
+        """当前各分桶（含 +Inf）的计数，用作 quantile 的 since 参数以计算一段时间内的分位数"""
+        self._check_labels(labelvalues)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            return list(state[:-1]) if state else [0] * (len(self.buckets) + 1)
+
+    def quantile(self, q: float, *labelvalues, since: Optional[list[int]] = None) -> Optional[float]:
+        """按分桶线性插值估计分位数（同 Prometheus 的 histogram_quantile），没有样本时返回 None
+
+        since 为之前的 snapshot()，只统计其后的样本；落在 +Inf 分桶时返回最大的有限上界。
+        """
+        counts = self.snapshot(*labelvalues)
+        if since is not None:
+            counts = [count - before for count, before in zip(counts, since)]
+        total = sum(counts)
+        if total <= 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = [(labelvalues, list(state)) for labelvalues, state in self._values.items()]
+        for labelvalues, state in items:
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, [("le", _format_value(upper_bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # 模块被重复导入时复用已有指标,避免数据分裂
+                assert type(existing) is type(metric), f"metric {metric.name} already registered as {existing.type_name}"
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# 进程级默认注册表
+REGISTRY = MetricsRegistry()
+
+
+def start_http_server(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """在后台线程中启动只提供 /metrics 的 HTTP 服务,供没有 Web 框架的进程(如 worker)被抓取"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True, name=f"MetricsServer-{port}")
+    thread.start()
+    return server
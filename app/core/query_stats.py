@@ -0,0 +1,135 @@
+"""SQL 查询统计
+
+基于 SQLAlchemy 引擎事件统计当前作用域(一次 HTTP 请求或一次 Celery 任务)内的
+查询次数与耗时,并把同一作用域内重复执行的语句识别为疑似 N+1。
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Optional
+
+from app.core.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    # worker 通过 telemetry 导入本模块,运行时不引入 SQLAlchemy
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# 同一语句在一个作用域内执行达到该次数即视为疑似 N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+# IN (?, ?, ?) / IN (%(id_1)s, %(id_2)s) 等展开后的参数列表归一化为同一形态
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|%s))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by operation",
+    ("operation",),
+)
+
+
+def statement_shape(statement: str) -> str:
+    """返回语句的归一化形态,参数值本身已由 SQLAlchemy 绑定,这里只归一化空白与参数列表"""
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """返回重复执行次数达到阈值的语句形态"""
+        return [(shape, count) for shape, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_seconds * 1e3:.3f};desc="{self.count} queries"'
+
+    def log(self, scope: str, name: str) -> None:
+        """输出结构化日志: 疑似 N+1 时为 WARNING,其余为 DEBUG,默认级别下正常请求不产生日志"""
+        repeated = self.repeated()
+        if not repeated and not logger.isEnabledFor(logging.DEBUG):
+            return
+        extra = {
+            "scope": scope,
+            "scope_name": name,
+            "db_queries": self.count,
+            "db_time_ms": round(self.total_seconds * 1e3, 3),
+            "n_plus_one": [{"statement": shape, "count": count} for shape, count in repeated],
+        }
+        if repeated:
+            logger.warning(
+                f"{scope} {name}: {self.count} queries in {extra['db_time_ms']} ms, "
+                f"likely N+1: {[(shape[:120], count) for shape, count in repeated]}",
+                extra=extra,
+            )
+        else:
+            logger.debug(f"{scope} {name}: {self.count} queries in {extra['db_time_ms']} ms", extra=extra)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def begin_tracking() -> tuple[QueryStats, Token]:
+    """开始在当前上下文内统计 SQL 查询,返回的 token 用于 end_tracking"""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_tracking(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+@contextmanager
+def track_queries():
+    """在当前上下文内统计 SQL 查询,可嵌套,内层作用域的查询不计入外层"""
+    stats, token = begin_tracking()
+    try:
+        yield stats
+    finally:
+        end_tracking(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    QUERY_LATENCY.observe(elapsed, statement.lstrip().split(None, 1)[0].upper())
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # 执行失败时不会触发 after_cursor_execute,这里弹出对应的开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: "Engine") -> None:
+    from sqlalchemy import event
+
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -1,5 +1,14 @@
+from enum import Enum
+
 from pydantic_settings import BaseSettings
 
+class LoaderStrategy(str, Enum):
+    """关系属性的加载策略"""
+    LAZY = "lazy"          # 访问时逐条查询,列表会产生 1+N 次查询
+    SELECTIN = "selectin"  # 每个关系额外一条 SELECT ... IN 查询,查询次数与数量无关
+    JOINED = "joined"      # 与主查询 JOIN 在一条 SQL 中加载
+    RAISE = "raise"        # 禁止懒加载,访问未加载的关系时抛出异常
+
 class APISettings(BaseSettings):
     title: str
     version: str
@@ -11,6 +20,8 @@ class APISettings(BaseSettings):
 class DatabaseSettings(BaseSettings):
     url: str
     echo: bool
+    # 仓储默认的关系加载策略,与 config.yml 的默认值一致
+    loader_strategy: LoaderStrategy = LoaderStrategy.RAISE
 
 # class CelerySettings(BaseSettings):
 #     broker_url: str
@@ -4,10 +4,12 @@ from unittest.mock import Base
 from uuid import UUID, uuid4
 from pydantic import BaseModel
 from sqlmodel import Field, Relationship, SQLModel
-from sqlalchemy import TIMESTAMP, table
+from sqlalchemy import JSON, TIMESTAMP, table
 from enum import Enum
 from sqlalchemy.dialects.postgresql import JSONB
 
+# PostgreSQL 下使用 JSONB,其它数据库(如 local profile 的 SQLite)退化为 JSON
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
 
 class BaseSQLModel(SQLModel, table=False):
     """基础模型,所有表都应该有这些字段"""
@@ -92,7 +94,7 @@ class ConfigBaseSQLModel(SQLModel, table=False):
 
     params: dict = Field(
         default={},
-        sa_type=JSONB,  # 指定为 PostgreSQL 的 JSONB 类型
+        sa_type=JSONVariant,  # PostgreSQL 中为 JSONB 类型
         description="配置参数"
     )
 
@@ -108,7 +110,9 @@ class ModelConfigUpdate(ModelConfigBase):
     id: UUID
 
 class ModelConfigPublic(ModelConfigBase):
-    pass
+    id: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
 class ModelConfig(BaseSQLModel, ModelConfigBase, table=True):
     __tablename__ = "model_configs"
@@ -131,6 +135,11 @@ class SystemConfigBase(ConfigBaseSQLModel):
 class SystemConfigCreate(SystemConfigBase):
     pass
 
+class SystemConfigPublic(SystemConfigBase):
+    id: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class SystemConfig(BaseSQLModel, SystemConfigBase, table=True):
     __tablename__ = "system_configs"
 
@@ -149,6 +158,11 @@ class InferenceRuntimeConfigBase(ConfigBaseSQLModel):
 class InferenceRuntimeConfigCreate(InferenceRuntimeConfigBase):
     pass
 
+class InferenceRuntimeConfigPublic(InferenceRuntimeConfigBase):
+    id: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class InferenceRuntimeConfig(BaseSQLModel, InferenceRuntimeConfigBase, table=True):
     __tablename__ = "inference_runtime_configs"
 
@@ -167,6 +181,7 @@ class SimTaskStatusEnum(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class SimTaskBaseSQLModel(BaseSQLModel):
@@ -175,9 +190,14 @@ class SimTaskBaseSQLModel(BaseSQLModel):
     # user_id: UUID = Field(foreign_key="users.id")
     name: str = Field(index=True, unique=True, max_length=100)
     status: SimTaskStatusEnum = Field(default=SimTaskStatusEnum.PENDING)
+    celery_task_id: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="最近一次提交的 Celery 任务 id,用于取消"
+    )
     result: dict = Field(
         default={},
-        sa_type=JSONB,
+        sa_type=JSONVariant,
         description="存储结果"
     )
 
@@ -190,6 +210,25 @@ class InferenceSimTaskCreate(SQLModel):
     system_config: SystemConfigCreate
     runtime_config: InferenceRuntimeConfigCreate
 
+class InferenceSimTaskPublic(SQLModel):
+    """推理任务的对外模型,只包含本表字段,序列化时不会触发关系加载"""
+    id: UUID
+    name: str
+    status: SimTaskStatusEnum
+    result: dict
+    celery_task_id: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    model_config_id: UUID
+    system_config_id: UUID
+    runtime_config_id: UUID
+
+class InferenceSimTaskDetail(InferenceSimTaskPublic):
+    """包含关联配置的推理任务,需要配合 selectin/joined 加载策略使用"""
+    model_config_: ModelConfigPublic
+    system_config: SystemConfigPublic
+    runtime_config: InferenceRuntimeConfigPublic
+
 class InferenceSimTask(SimTaskBaseSQLModel, table=True):
     __tablename__ = "inference_sim_tasks"
 
@@ -1,10 +1,12 @@
 """Repositories module."""
 
-from typing import Iterator, TypeVar
+from typing import Iterator, Optional, TypeVar
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, joinedload, lazyload, raiseload, selectinload
 
+from app.core.settings import LoaderStrategy
 from app.domain.models import TBaseSQLModel
 
 class RepositoryNotFoundError(Exception):
@@ -12,22 +14,88 @@ class RepositoryNotFoundError(Exception):
         super().__init__(f"{entity_cls.__name__} not found, id: {entity_id}")
 
 
+_LOADERS = {
+    LoaderStrategy.LAZY: lazyload,
+    LoaderStrategy.SELECTIN: selectinload,
+    LoaderStrategy.JOINED: joinedload,
+    LoaderStrategy.RAISE: raiseload,
+}
+
+
 class BaseRepository:
     model_cls: type[TBaseSQLModel]
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: Session, loader_strategy: Optional[LoaderStrategy] = None) -> None:
         assert isinstance(session, Session), f"session must be an instance of Session, but got {type(session)}"
         self.session = session
+        self.loader_strategy = LoaderStrategy(loader_strategy or LoaderStrategy.LAZY)
 
-    def get_all(self) -> Iterator[TBaseSQLModel]:
-        return self.session.query(self.model_cls).all()
+    def loader_options(self, loader_strategy: Optional[LoaderStrategy] = None) -> list:
+        """为 model_cls 的所有关系生成加载选项"""
+        loader = _LOADERS[LoaderStrategy(loader_strategy or self.loader_strategy)]
+        return [loader(relationship.class_attribute) for relationship in inspect(self.model_cls).relationships]
 
-    def get_by_id(self, entity_id: UUID) -> TBaseSQLModel:
-        entity = self.session.get(self.model_cls, entity_id)
+    def get_all(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        loader_strategy: Optional[LoaderStrategy] = None,
+    ) -> Iterator[TBaseSQLModel]:
+        query = (
+            self.session.query(self.model_cls)
+            .options(*self.loader_options(loader_strategy))
+            .order_by(self.model_cls.created_at, self.model_cls.id)
+            .offset(offset)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_by_id(self, entity_id: UUID, loader_strategy: Optional[LoaderStrategy] = None) -> TBaseSQLModel:
+        entity = self.session.get(self.model_cls, entity_id, options=self.loader_options(loader_strategy))
         if not entity:
             raise RepositoryNotFoundError(self.model_cls, entity_id)
         return entity
 
+    def get_version(self, entity_id: UUID) -> tuple:
+        """只查询 (id, created_at, updated_at),用于计算 ETag,不加载整行"""
+        version = self.session.execute(
+            select(self.model_cls.id, self.model_cls.created_at, self.model_cls.updated_at)
+            .where(self.model_cls.id == entity_id)
+        ).first()
+        if not version:
+            raise RepositoryNotFoundError(self.model_cls, entity_id)
+        return tuple(version)
+
+    def get_versions(self, offset: int = 0, limit: Optional[int] = None) -> list[tuple]:
+        """与 get_all 相同的排序与分页,只查询版本列"""
+        query = (
+            select(self.model_cls.id, self.model_cls.created_at, self.model_cls.updated_at)
+            .order_by(self.model_cls.created_at, self.model_cls.id)
+            .offset(offset)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return [tuple(version) for version in self.session.execute(query)]
+
+    def get_by_ids(
+        self,
+        entity_ids: list[UUID],
+        loader_strategy: Optional[LoaderStrategy] = None,
+    ) -> list[TBaseSQLModel]:
+        """按 id 批量查询(单条 SQL),任一 id 不存在时抛出 RepositoryNotFoundError"""
+        entities = (
+            self.session.query(self.model_cls)
+            .options(*self.loader_options(loader_strategy))
+            .filter(self.model_cls.id.in_(entity_ids))
+            .all()
+        )
+        found_ids = {entity.id for entity in entities}
+        for entity_id in entity_ids:
+            if entity_id not in found_ids:
+                raise RepositoryNotFoundError(self.model_cls, entity_id)
+        return entities
+
     def create(self, entity: TBaseSQLModel) -> TBaseSQLModel:
         entity = self.model_cls(**entity.model_dump())
         self.session.add(entity)
@@ -1,8 +1,8 @@
-from typing import TypeVar
+from typing import Optional, TypeVar
 from sqlalchemy.orm import Session
-from app.repositories.base import TBaseRepository
+from app.repositories.base import LoaderStrategy, TBaseRepository
 from uuid import UUID
-from app.domain.models import InferenceSimTask, TBaseSQLModel
+from app.domain.models import TBaseSQLModel
 
 class BaseService:
     repository_cls: type[TBaseRepository]
@@ -11,14 +11,20 @@ class BaseService:
         self.repository = repository
 
     @classmethod
-    def create_instance(cls, session: Session):
-        return cls(cls.repository_cls(session))
+    def create_instance(cls, session: Session, loader_strategy: Optional[LoaderStrategy] = None):
+        return cls(cls.repository_cls(session, loader_strategy))
 
-    def get_all(self):
-        return self.repository.get_all()
+    def get_all(self, offset: int = 0, limit: Optional[int] = None):
+        return self.repository.get_all(offset=offset, limit=limit)
 
     def get_by_id(self, entity_id: UUID):
         return self.repository.get_by_id(entity_id)
+
+    def get_version(self, entity_id: UUID):
+        return self.repository.get_version(entity_id)
+
+    def get_versions(self, offset: int = 0, limit: Optional[int] = None):
+        return self.repository.get_versions(offset=offset, limit=limit)
     
     def create(self, entity: TBaseSQLModel):
         return self.repository.create(entity)
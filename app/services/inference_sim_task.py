@@ -1,12 +1,29 @@
-from uuid import UUID
-from app.domain.models import InferenceRuntimeConfig, InferenceSimTaskCreate, InferenceSimTask, ModelConfig, SystemConfig
+import logging
+from typing import Optional
+from uuid import UUID, uuid4
+from app.domain.models import InferenceRuntimeConfig, InferenceRuntimeConfigPublic, InferenceSimTaskCreate, InferenceSimTask, ModelConfig, ModelConfigPublic, SimTaskStatusEnum, SystemConfig, SystemConfigPublic
+from app.repositories.base import LoaderStrategy
 from app.repositories.inference_runtime_config import InferenceRuntimeConfigRepository
 from app.repositories.inference_sim_task import InferenceSimTaskRepository
 from app.repositories.model_config import ModelConfigRepository
 from app.repositories.system_config import SystemConfigRepository
 from app.services.base import BaseService
+from app.worker.celery import app as celery_app
 from app.worker.inference_sim_task import run_task
 
+logger = logging.getLogger(__name__)
+
+# 已结束的任务无需再取消
+FINISHED_STATUSES = (
+    SimTaskStatusEnum.COMPLETED,
+    SimTaskStatusEnum.FAILED,
+    SimTaskStatusEnum.CANCELLED,
+)
+
+# SIGUSR1 在 prefork 子进程中会被转换为 SoftTimeLimitExceeded,
+# 任务可以在 finally 中杀掉容器内进程并把容器归还到池中,而不是直接被 SIGTERM 杀死
+REVOKE_SIGNAL = "SIGUSR1"
+
 class InferenceSimTaskService(BaseService):
     repository_cls = InferenceSimTaskRepository
 
@@ -38,10 +55,58 @@ class InferenceSimTaskService(BaseService):
         return super().create(entity)
     
     def run(self, inference_sim_task_id: UUID):
+        """提交任务;Celery 任务 id 先行生成并提交,发布之后到达的取消或先开始执行的 worker 都能看到它"""
         inference_sim_task : InferenceSimTask = self.repository.get_by_id(inference_sim_task_id)
         if not inference_sim_task:
             raise ValueError(f"inference_sim_task_id {inference_sim_task_id} not found")
-        task = run_task.delay(inference_sim_task_id)
-        print(task)
+        celery_task_id = str(uuid4())
+        inference_sim_task.celery_task_id = celery_task_id
+        self.repository.session.commit()
+        run_task.apply_async((inference_sim_task_id,), task_id=celery_task_id)
+        logger.info(f"inference_sim_task {inference_sim_task_id} submitted as celery task {celery_task_id}")
+        return inference_sim_task
+
+    def start(self, inference_sim_task_id: UUID) -> Optional[dict]:
+        """标记任务开始执行,返回交给引擎处理的 {名称: 配置};任务已结束(如已取消)时返回 None"""
+        inference_sim_task: InferenceSimTask = self.repository.get_by_id(inference_sim_task_id, LoaderStrategy.SELECTIN)
+        if inference_sim_task.status in FINISHED_STATUSES:
+            return None
+        inference_sim_task.status = SimTaskStatusEnum.RUNNING
+        self.repository.session.flush()
+        return {
+            "model_config": ModelConfigPublic.model_validate(inference_sim_task.model_config_).model_dump(mode="json"),
+            "system_config": SystemConfigPublic.model_validate(inference_sim_task.system_config).model_dump(mode="json"),
+            "runtime_config": InferenceRuntimeConfigPublic.model_validate(inference_sim_task.runtime_config).model_dump(mode="json"),
+        }
+
+    def finish(self, inference_sim_task_id: UUID, status: SimTaskStatusEnum, result: dict) -> InferenceSimTask:
+        """记录执行结果;执行期间任务被取消时保留取消状态"""
+        inference_sim_task: InferenceSimTask = self.repository.get_by_id(inference_sim_task_id)
+        if inference_sim_task.status != SimTaskStatusEnum.CANCELLED:
+            inference_sim_task.status = status
+        inference_sim_task.result = result
+        self.repository.session.flush()
+        logger.info(f"inference_sim_task {inference_sim_task_id} finished: {inference_sim_task.status.value}")
+        return inference_sim_task
+
+    def cancel(self, inference_sim_task_id: UUID) -> InferenceSimTask:
+        inference_sim_task: InferenceSimTask = self.repository.get_by_id(inference_sim_task_id)
+        self._cancel([inference_sim_task])
         return inference_sim_task
-    
\ No newline at end of file
+
+    def cancel_batch(self, inference_sim_task_ids: list[UUID]) -> list[InferenceSimTask]:
+        inference_sim_tasks = self.repository.get_by_ids(inference_sim_task_ids)
+        self._cancel(inference_sim_tasks)
+        return inference_sim_tasks
+
+    def _cancel(self, inference_sim_tasks: list[InferenceSimTask]) -> None:
+        """撤销排队中的任务、终止运行中的任务,并把记录标记为已取消"""
+        to_cancel = [task for task in inference_sim_tasks if task.status not in FINISHED_STATUSES]
+        celery_task_ids = [task.celery_task_id for task in to_cancel if task.celery_task_id]
+        if celery_task_ids:
+            # 一次广播撤销所有任务: 排队中的任务被 worker 丢弃,运行中的任务收到 REVOKE_SIGNAL
+            celery_app.control.revoke(celery_task_ids, terminate=True, signal=REVOKE_SIGNAL)
+        for task in to_cancel:
+            task.status = SimTaskStatusEnum.CANCELLED
+        self.repository.session.flush()
+        logger.info(f"cancelled {len(to_cancel)} inference_sim_tasks, revoked celery tasks: {celery_task_ids}")
@@ -6,15 +6,41 @@ import time
 from celery import Celery
 
 
-from app.core.dependencies import Container
-config = Container.config()
+from app.core.config import get_config
+
+
+def _celery_settings() -> dict:
+    """第一次访问 app.conf 时才解析 config.yml,导入本模块(如 `celery inspect ping`)不付出配置成本"""
+    config = get_config()["celery"]
+    # Celery 会优先读取 CELERY_BROKER_URL/CELERY_RESULT_BACKEND 环境变量,
+    # 这里同步为 config.yml 的值,保证 profile(如 local 的 memory://)生效
+    os.environ["CELERY_BROKER_URL"] = config["broker_url"]
+    os.environ["CELERY_RESULT_BACKEND"] = config["result_backend"]
+    settings = {
+        "broker_url": config["broker_url"],
+        "result_backend": config["result_backend"],
+        "task_track_started": True,
+        "task_serializer": "json",
+        "result_serializer": "json",
+        "accept_content": ["json"],
+        "worker_send_task_events": True,
+        "broker_transport_options": config.get("broker_transport_options", {}),
+        "worker_metrics_port": config.get("metrics_port", 0),
+        # 每个进程只预取一个任务: 引擎池按进程内并发数配置(见 app.worker.engine_pool),
+        # 多预取的任务只会占着消息等待,不如留在 broker 中交给空闲的进程
+        "worker_prefetch_multiplier": 1,
+    }
+    if config.get("worker_concurrency"):
+        # 并发数同时决定每个进程的引擎池大小,总容器数 = 进程数 × 每进程并发任务数
+        settings["worker_concurrency"] = config["worker_concurrency"]
+    return settings
+
 
 app = Celery(
     __name__,
-    broker=config["celery"]["broker_url"],
-    backend=config["celery"]["result_backend"],
     include=["app.worker.tasks", "app.worker.inference_sim_task"]
 )
+app.add_defaults(_celery_settings)
 
 # """
 # task_track_started=True
@@ -33,14 +59,9 @@ app = Celery(
 # 允许Worker发送任务事件（如任务开始/成功/失败）。结合监控工具（如Flower）可实现实时任务追踪。
 
 # """
-app.conf.update(
-    task_track_started=True,
-    task_serializer='json',
-    result_serializer='json',
-    accept_content=['json'],
-    worker_send_task_events=True,
-)
 
+# 注册任务信号(排队/执行耗时、查询统计等)
+from app.worker import telemetry  # noqa: E402,F401
 
 # @app.task
 # def create_task(task_type):
@@ -0,0 +1,147 @@
+"""worker 进程内的引擎容器池
+
+每个执行任务的进程持有一个 ContainerPool,在进程启动时创建并预热,进程退出时关闭:
+prefork 子进程(以及 solo 池的主进程)由 worker_process_init/worker_process_shutdown 管理,
+threads/gevent 等池在主进程内执行任务,由 worker_init/worker_shutdown 管理。
+
+池的大小与进程内并发执行的任务数一致(prefork/solo 为 1,其它池为 worker 的 concurrency),
+每个任务只占用一个容器,池固定大小且已预热,任务拿到 worker 名额后不会再等待容器。
+配合 worker_prefetch_multiplier=1,排队的任务留在 broker 中,不会被忙碌的进程预取后干等。
+"""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+
+from celery import signals
+
+logger = logging.getLogger(__name__)
+
+# processor_client/executor_backends 位于仓库根目录,celery 命令加载应用后会把当前目录移出 sys.path
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_lock = threading.Lock()
+_pool = None
+# 进程内并发执行的任务数,由 worker_init 按池类型记录,prefork 子进程继承该值
+_tasks_per_process = 1
+
+
+def engine_settings() -> dict:
+    from app.core.config import get_config
+
+    return get_config()["engine"]
+
+
+def create_pool(size: int, settings: dict):
+    """按 engine 配置创建固定大小的 ContainerPool,输入/输出目录位于 work_dir 下"""
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+    from executor_backends import LocalProcessBackend
+    from processor_client import ContainerConfig, ContainerPool
+
+    input_dir = os.path.join(settings["work_dir"], "input")
+    output_dir = os.path.join(settings["work_dir"], "output")
+    backend = None
+    if settings.get("backend", "docker") == "local":
+        backend = LocalProcessBackend(os.path.abspath(input_dir), os.path.abspath(output_dir))
+    config = ContainerConfig(
+        image=settings.get("image", ContainerConfig.image),
+        max_containers=size,
+        idle_timeout=settings.get("idle_timeout", ContainerConfig.idle_timeout),
+    )
+    return ContainerPool(config, input_dir, output_dir, backend=backend)
+
+
+def init_pool(tasks_per_process: int = None, settings: dict = None):
+    """创建当前进程的池(已存在时直接返回)"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            size = max(1, tasks_per_process or _tasks_per_process)
+            _pool = create_pool(size, settings or engine_settings())
+            logger.info(f"engine pool {_pool.pool_id} created in process {os.getpid()}, size={size}")
+        return _pool
+
+
+def get_pool():
+    """当前进程的池;未经 worker 信号创建时(如进程内 worker、eager 执行)按需创建"""
+    return _pool or init_pool()
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        logger.info(f"shutting down engine pool {pool.pool_id} in process {os.getpid()}")
+        pool.shutdown()
+
+
+def run_configs(name: str, configs: dict, on_progress=None, job_id=None) -> dict:
+    """在一个容器内由引擎一次处理 {名称: 配置},返回 {名称: 结果}
+
+    配置写入输入目录的 <name>/ 下,处理完成后删除输入与输出文件;结果包含退出码、引擎输出,
+    成功时另带解析后的输出 "result"。on_progress 收到 {"done", "total", "config": 名称}。
+    """
+    pool = get_pool()
+    pairs = [(f"{name}/{key}.json", f"{name}/{key}.json") for key in configs]
+    os.makedirs(os.path.join(pool.input_dir, name), exist_ok=True)
+    for (config_file, _), config in zip(pairs, configs.values()):
+        with open(os.path.join(pool.input_dir, config_file), "w") as f:
+            json.dump(config, f)
+
+    def progress(message):
+        on_progress({
+            "done": message.get("done"),
+            "total": message.get("total"),
+            "config": os.path.splitext(os.path.basename(message.get("config") or ""))[0],
+        })
+
+    try:
+        results = pool.process_configs(pairs, job_id=job_id, on_progress=progress if on_progress else None)
+        outputs = {}
+        for key, (_, output_file), result in zip(configs, pairs, results):
+            output = {"exit_code": result["exit_code"], "message": result["output"].strip()}
+            if result["exit_code"] == 0:
+                with open(os.path.join(pool.output_dir, output_file)) as f:
+                    output["result"] = json.load(f)
+            outputs[key] = output
+        return outputs
+    finally:
+        shutil.rmtree(os.path.join(pool.input_dir, name), ignore_errors=True)
+        shutil.rmtree(os.path.join(pool.output_dir, name), ignore_errors=True)
+
+
+def _runs_in_child_processes(worker) -> bool:
+    from celery.concurrency import get_implementation
+    from celery.concurrency.prefork import TaskPool as PreforkPool
+    from celery.concurrency.solo import TaskPool as SoloPool
+
+    return issubclass(get_implementation(worker.pool_cls), (PreforkPool, SoloPool))
+
+
+@signals.worker_init.connect
+def configure_engine_pool(sender=None, **kwargs):
+    # 主进程:记录进程内并发数;threads 等池在主进程内执行任务,此时创建池
+    global _tasks_per_process
+    if _runs_in_child_processes(sender):
+        _tasks_per_process = 1
+    else:
+        _tasks_per_process = sender.concurrency
+        init_pool()
+
+@signals.worker_process_init.connect
+def start_process_engine_pool(**kwargs):
+    # prefork 子进程(以及 solo 池的主进程),fork 之后才创建,子进程不会继承池的线程
+    init_pool()
+
+@signals.worker_process_shutdown.connect
+def stop_process_engine_pool(**kwargs):
+    shutdown_pool()
+
+@signals.worker_shutdown.connect
+def stop_engine_pool(**kwargs):
+    shutdown_pool()
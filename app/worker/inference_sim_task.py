@@ -26,8 +26,12 @@ from app.worker.celery import app
 # )
 
 from celery import Task
+from celery.exceptions import SoftTimeLimitExceeded
+from app.worker import engine_pool
 from app.worker.celery import app
 import logging
+
+logger = logging.getLogger(__name__)
 # 自定义任务类
 class CustomTask(Task):
     # 1. 自动重试配置 (可选)
@@ -63,7 +67,43 @@ class CustomTask(Task):
             logger.addHandler(handler)
         return logger
 
-@app.task
-def run_task(sim_task_id: UUID):
-    time.sleep(10)
-    return True
+@app.task(bind=True)
+def run_task(self, sim_task_id: UUID):
+    """在当前进程的引擎池中执行任务的三个配置,结果与状态写回任务记录
+
+    执行进度以 PROGRESS 状态上报({"done", "total", "config"});撤销(REVOKE_SIGNAL)或超过软时限时
+    SoftTimeLimitExceeded 中断执行,池会杀掉容器内的引擎进程并归还容器。
+    """
+    # 服务层与数据库在执行时才导入,worker 启动与健康检查不付出这部分导入成本
+    from app.core.dependencies import Container
+    from app.domain.models import SimTaskStatusEnum
+    from app.services.inference_sim_task import InferenceSimTaskService
+
+    sim_task_id = UUID(str(sim_task_id))
+    db = Container.db()
+
+    def finish(status, result):
+        with db.session_scope() as session:
+            InferenceSimTaskService.create_instance(session).finish(sim_task_id, status, result)
+
+    with db.session_scope() as session:
+        configs = InferenceSimTaskService.create_instance(session).start(sim_task_id)
+    if configs is None:
+        logger.info(f"inference_sim_task {sim_task_id} already finished, skipped")
+        return {"status": "skipped"}
+
+    def on_progress(progress):
+        self.update_state(state="PROGRESS", meta=progress)
+
+    try:
+        outputs = engine_pool.run_configs(str(sim_task_id), configs, on_progress, job_id=self.request.id)
+    except SoftTimeLimitExceeded:
+        finish(SimTaskStatusEnum.FAILED, {"error": "time limit exceeded or task revoked"})
+        raise
+    except Exception as e:
+        finish(SimTaskStatusEnum.FAILED, {"error": str(e)})
+        raise
+    ok = all(output["exit_code"] == 0 for output in outputs.values())
+    status = SimTaskStatusEnum.COMPLETED if ok else SimTaskStatusEnum.FAILED
+    finish(status, outputs)
+    return {"status": status.value}
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+from celery import signals
+
+from app.worker.celery import app
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def in_process_worker(
+    pool: str = "threads",
+    concurrency: int = 4,
+    ready_timeout: float = 30.0,
+    shutdown_timeout: float = 60.0,
+):
+    """在当前进程内启动 worker
+
+    配合 local profile 的 memory:// broker 使用: 消息仍然经过 kombu 的 json 序列化与队列投递,
+    任务在 worker 线程池中并发执行,只是不需要 RabbitMQ/Redis。
+    worker 是在后台线程中运行的 WorkController,与 celery worker 命令发送相同的
+    worker_init/worker_ready/worker_shutdown 信号,退出时等待执行中的任务完成。
+    """
+    from celery.platforms import EX_OK
+    from celery.result import _set_task_join_will_block
+    from celery.worker import state
+
+    ready = threading.Event()
+
+    def on_consumer_ready(consumer):
+        signals.worker_ready.send(sender=consumer)
+        ready.set()
+
+    logger.info(f"starting in-process celery worker, pool={pool}, concurrency={concurrency}")
+    app.log.setup(loglevel="INFO")
+    worker = app.WorkController(
+        pool=pool,
+        concurrency=concurrency,
+        loglevel="INFO",
+        ready_callback=on_consumer_ready,
+        # 进程内只有一个 worker,不需要与其它节点同步
+        without_heartbeat=True,
+        without_mingle=True,
+        without_gossip=True,
+    )
+    thread = threading.Thread(target=worker.start, daemon=True, name="InProcessWorker")
+    thread.start()
+    try:
+        deadline = time.monotonic() + ready_timeout
+        while not ready.wait(0.1):
+            if not thread.is_alive():
+                raise RuntimeError("in-process celery worker exited during startup")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"in-process celery worker not ready after {ready_timeout}s")
+        # worker 创建池时会禁止在 worker 进程内阻塞等待结果,API 与 worker 同进程,需要恢复
+        _set_task_join_will_block(False)
+        yield worker
+    finally:
+        # 与 worker 收到 SIGTERM 时相同的温和关闭: 事件循环检查到标志后停止消费,
+        # 等待执行中的任务,并发送 worker_shutdown 关闭进程内的引擎池
+        state.should_stop = EX_OK
+        thread.join(shutdown_timeout)
+        state.should_stop = None
+        if thread.is_alive():
+            logger.warning(f"in-process celery worker did not stop within {shutdown_timeout}s")
@@ -1,5 +1,13 @@
+import numpy as np
+from celery import chord
+
 from app.worker.celery import app
 
+# 分块规约支持的运算
+REDUCTIONS = ("sum", "mean", "min", "max", "histogram")
+# 每个分块的元素个数，决定单条消息的大小
+DEFAULT_CHUNK_SIZE = 10_000
+
 @app.task
 def add(x, y):
     return x + y
@@ -12,4 +20,75 @@ def mul(x, y):
 
 @app.task
 def xsum(numbers):
-    return sum(numbers)
\ No newline at end of file
+    return sum(numbers)
+
+
+@app.task
+def reduce_chunk(numbers, reduction, bins=10, value_range=None):
+    """对单个分块做向量化规约，返回可合并的部分结果"""
+    values = np.asarray(numbers, dtype=np.float64)
+    partial = {"count": int(values.size)}
+    if reduction in ("sum", "mean"):
+        partial["sum"] = float(values.sum())
+    elif reduction == "min":
+        partial["min"] = float(values.min()) if values.size else None
+    elif reduction == "max":
+        partial["max"] = float(values.max()) if values.size else None
+    elif reduction == "histogram":
+        counts, _ = np.histogram(values, bins=bins, range=value_range)
+        partial["counts"] = counts.tolist()
+    else:
+        raise ValueError(f"unsupported reduction: {reduction}")
+    return partial
+
+
+@app.task
+def combine_partials(partials, reduction, bins=10, value_range=None):
+    """合并各分块的部分结果"""
+    count = sum(partial["count"] for partial in partials)
+    if reduction == "sum":
+        return float(np.sum([partial["sum"] for partial in partials]))
+    if reduction == "mean":
+        total = float(np.sum([partial["sum"] for partial in partials]))
+        return total / count if count else None
+    if reduction in ("min", "max"):
+        values = [partial[reduction] for partial in partials if partial[reduction] is not None]
+        if not values:
+            return None
+        return float(np.min(values)) if reduction == "min" else float(np.max(values))
+    if reduction == "histogram":
+        counts = np.zeros(bins, dtype=np.int64)
+        for partial in partials:
+            counts += np.asarray(partial["counts"], dtype=np.int64)
+        edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+        return {"count": count, "counts": counts.tolist(), "edges": edges.tolist()}
+    raise ValueError(f"unsupported reduction: {reduction}")
+
+
+def aggregate_signature(numbers, reduction="sum", chunk_size=DEFAULT_CHUNK_SIZE, bins=10, value_range=None):
+    """把大数组切块，构造 chord: 各分块并行规约，最后由 combine_partials 合并"""
+    if reduction not in REDUCTIONS:
+        raise ValueError(f"unsupported reduction: {reduction}, must be one of {REDUCTIONS}")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, but got {chunk_size}")
+
+    values = np.asarray(numbers, dtype=np.float64).ravel()
+    if reduction == "histogram" and value_range is None:
+        # 所有分块必须使用相同的分箱边界，部分结果才能直接相加
+        value_range = (float(values.min()), float(values.max())) if values.size else (0.0, 1.0)
+    if value_range is not None:
+        value_range = [float(value_range[0]), float(value_range[1])]
+
+    header = [
+        reduce_chunk.s(values[start:start + chunk_size].tolist(), reduction, bins, value_range)
+        for start in range(0, values.size, chunk_size)
+    ]
+    body = combine_partials.s(reduction, bins, value_range)
+    if not header:
+        return body.clone(args=([],))
+    return chord(header, body)
+
+
+def aggregate(numbers, reduction="sum", chunk_size=DEFAULT_CHUNK_SIZE, bins=10, value_range=None):
+    """提交分块规约，返回最终结果的 AsyncResult"""
+    return aggregate_signature(numbers, reduction, chunk_size, bins, value_range).delay()
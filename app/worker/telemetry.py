@@ -0,0 +1,107 @@
+"""worker 侧的遥测
+
+基于 Celery 信号统计每个任务的排队等待时间、执行时间、重试与失败次数,以及任务内的 SQL 查询。
+指标记录在执行任务的进程内,由 worker_metrics_port 指定的 /metrics 端点暴露:
+prefork 池的每个子进程监听 worker_metrics_port + 子进程序号,其它池由主进程监听 worker_metrics_port。
+"""
+
+import logging
+import time
+
+from billiard.process import current_process
+from celery import current_app, signals
+
+from app.core.metrics import REGISTRY, start_http_server
+from app.core.query_stats import begin_tracking, end_tracking
+
+logger = logging.getLogger(__name__)
+
+# 消息头中记录发布时间的字段,发布方与 worker 位于不同进程,使用墙钟时间
+PUBLISHED_AT_HEADER = "published_at"
+
+# 任务耗时的分桶(秒),覆盖从毫秒级到小时级的任务
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+TASK_QUEUE_WAIT = REGISTRY.histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from publishing a task to a worker starting it",
+    ("task",),
+    TASK_BUCKETS,
+)
+TASK_EXECUTION = REGISTRY.histogram(
+    "celery_task_execution_seconds",
+    "Task execution time by final state",
+    ("task", "state"),
+    TASK_BUCKETS,
+)
+TASK_RETRIES = REGISTRY.counter(
+    "celery_task_retries_total",
+    "Task retries",
+    ("task",),
+)
+TASK_FAILURES = REGISTRY.counter(
+    "celery_task_failures_total",
+    "Task failures by exception type",
+    ("task", "exception"),
+)
+
+# task_id -> (开始时间, 查询统计, contextvar token)
+_running_tasks = {}
+# 当前进程的 /metrics 服务
+_metrics_server = None
+
+@signals.before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    headers[PUBLISHED_AT_HEADER] = time.time()
+
+@signals.task_prerun.connect
+def on_task_prerun(task_id=None, task=None, **kwargs):
+    published_at = task.request.get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        TASK_QUEUE_WAIT.observe(max(0.0, time.time() - published_at), task.name)
+    stats, token = begin_tracking()
+    _running_tasks[task_id] = (time.perf_counter(), stats, token)
+
+@signals.task_postrun.connect
+def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    running = _running_tasks.pop(task_id, None)
+    if running is None:
+        return
+    started_at, stats, token = running
+    TASK_EXECUTION.observe(time.perf_counter() - started_at, task.name, state or "UNKNOWN")
+    end_tracking(token)
+    if stats.count:
+        stats.log("task", task.name)
+
+@signals.task_retry.connect
+def on_task_retry(sender=None, **kwargs):
+    TASK_RETRIES.inc(sender.name)
+
+@signals.task_failure.connect
+def on_task_failure(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.inc(sender.name, type(exception).__name__)
+
+def _start_metrics_server(port: int) -> None:
+    global _metrics_server
+    if _metrics_server is not None or not port:
+        return
+    try:
+        _metrics_server = start_http_server(port)
+        logger.info(f"worker metrics available on :{port}/metrics")
+    except OSError as e:
+        logger.warning(f"failed to start worker metrics server on port {port}: {e}")
+
+@signals.worker_process_init.connect
+def start_process_metrics_server(**kwargs):
+    # prefork 子进程(以及 solo 池的主进程)
+    port = int(current_app.conf.get("worker_metrics_port") or 0)
+    if port:
+        _start_metrics_server(port + getattr(current_process(), "index", 0))
+
+@signals.worker_ready.connect
+def start_worker_metrics_server(sender=None, **kwargs):
+    # threads/gevent 等池在主进程内执行任务,不会触发 worker_process_init
+    from celery.concurrency.prefork import TaskPool as PreforkPool
+
+    if not isinstance(sender.pool, PreforkPool):
+        _start_metrics_server(int(sender.app.conf.get("worker_metrics_port") or 0))
@@ -0,0 +1,100 @@
+"""引擎 JSON 读写的耗时与内存
+
+把 engine/input 下的样例配置放大为指定大小的文档({"configs": [...]}),在全新的解释器中
+以不同模式调用 engine/app.py 的 process_config,报告耗时、输出大小与进程峰值内存(RSS):
+
+    python -m benchmarks.engine_json
+    python -m benchmarks.engine_json --sizes 1 64 512 --modes stdlib orjson-compact stream
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+ENGINE_DIR = ROOT / "engine"
+
+# 模式 -> process_config 的参数
+MODES = {
+    "stdlib": {"json_backend": "stdlib", "stream": False},
+    "stdlib-compact": {"json_backend": "stdlib", "stream": False, "compact": True},
+    "orjson": {"json_backend": "orjson", "stream": False},
+    "orjson-compact": {"json_backend": "orjson", "stream": False, "compact": True},
+    "stream": {"stream": True},
+    "stream-compact": {"stream": True, "compact": True},
+}
+
+# 在子进程中执行,输出 {"exit_code", "seconds", "max_rss_kb"}
+RUNNER = """
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import app
+options = json.loads(sys.argv[4])
+start = time.perf_counter()
+exit_code, message = app.process_config(sys.argv[2], sys.argv[3], **options)
+print(json.dumps({"exit_code": exit_code, "message": message, "seconds": time.perf_counter() - start,
+                  "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def make_document(path: Path, size_mb: float) -> int:
+    """用 engine/input 的样例拼出约 size_mb 的配置文件,返回实际字节数"""
+    samples = [json.loads(sample.read_text()) for sample in sorted((ENGINE_DIR / "input").glob("*.json"))]
+    target = int(size_mb * 1024 * 1024)
+    with open(path, "w") as f:
+        f.write('{"configs": [')
+        written, index = 0, 0
+        while written < target:
+            # 每项带上不同的序号与数值,避免重复内容让解析器走捷径
+            item = {**samples[index % len(samples)], "id": index, "weight": index / 7, "name": f"config-{index}"}
+            text = ("," if index else "") + json.dumps(item)
+            f.write(text)
+            written += len(text)
+            index += 1
+        f.write("]}")
+    return path.stat().st_size
+
+
+def run(config: Path, output: Path, options: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER, str(ENGINE_DIR), str(config), str(output), json.dumps(options)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark engine JSON read/write modes.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 16, 128], help="document sizes in MiB")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ENGINE_DIR))
+    import json_io
+
+    modes = [mode for mode in args.modes if json_io.orjson is not None or not mode.startswith("orjson")]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for size_mb in args.sizes:
+            config = tmp / "config.json"
+            size = make_document(config, size_mb)
+            print(f"{size / 1024 / 1024:.1f} MiB config")
+            for mode in modes:
+                output = tmp / f"{mode}.json"
+                result = run(config, output, MODES[mode])
+                if result["exit_code"] != 0:
+                    raise RuntimeError(f"{mode}: {result['message']}")
+                print(
+                    f"  {mode:<16} {result['seconds']:>8.3f} s  "
+                    f"output {output.stat().st_size / 1024 / 1024:>8.1f} MiB  "
+                    f"peak rss {result['max_rss_kb'] / 1024:>8.1f} MiB"
+                )
+                output.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""进程入口模块的导入耗时
+
+在全新的解释器中以 `python -X importtime -c "import <module>"` 导入模块,解析 stderr 中的
+累计耗时,取多次运行的最小值以降低抖动。worker 子进程、CLI 与 `celery inspect ping` 健康检查
+每次启动都要付出这部分成本,BUDGETS 为各入口的预算,tests/test_import_time.py 会据此检查:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time app.worker.celery --runs 5 --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# 各入口模块的导入耗时预算(毫秒),可用 IMPORT_TIME_BUDGET_SCALE 按机器性能整体放宽
+BUDGETS = {
+    "app.core.config": 50,
+    "app.worker.celery": 400,
+    "app.api.main": 1500,
+}
+
+# 入口模块在导入时不应该引入的重量级依赖
+FORBIDDEN_IMPORTS = {
+    "app.core.config": ("yaml", "dependency_injector", "pydantic"),
+    "app.worker.celery": ("fastapi", "sqlalchemy", "sqlmodel", "docker", "dependency_injector"),
+    "app.api.main": ("docker", "sqlmodel", "uvicorn"),
+}
+
+
+def budget_scale() -> float:
+    return float(os.environ.get("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """在新的解释器中导入模块,返回由它引入的 {模块名: (自身耗时 us, 累计耗时 us)}
+
+    解释器启动时(site 等)导入的模块不计入。
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"failed to import {module}:\n{result.stderr}")
+    # -X importtime 先输出子模块、后输出父模块,顶层模块的缩进为 1 个空格
+    subtree = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        subtree.append((name.strip(), int(self_us), int(cumulative_us)))
+        if name.startswith(" ") and not name.startswith("  "):
+            if name.strip() == module:
+                break
+            subtree = []
+    else:
+        raise RuntimeError(f"no import time reported for {module}")
+    return {name: (self_us, cumulative_us) for name, self_us, cumulative_us in subtree}
+
+
+def measure(module: str, runs: int = 3) -> tuple[float, dict[str, tuple[int, int]]]:
+    """返回多次运行中最小的累计导入耗时(毫秒)及对应那次的明细"""
+    best_ms, best_times = None, {}
+    for _ in range(runs):
+        times = import_times(module)
+        total_ms = times[module][1] / 1e3
+        if best_ms is None or total_ms < best_ms:
+            best_ms, best_times = total_ms, times
+    return best_ms, best_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time of process entry modules.")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="modules to import (default: all budgeted)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module, the fastest is reported")
+    parser.add_argument("--top", type=int, default=10, help="slowest imported modules to show")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in args.modules:
+        total_ms, times = measure(module, args.runs)
+        budget = BUDGETS.get(module)
+        budget_text = f" / budget {budget * budget_scale():.0f} ms" if budget else ""
+        print(f"{module}: {total_ms:.1f} ms{budget_text}")
+        slowest = sorted(
+            ((name, cumulative) for name, (_, cumulative) in times.items() if name != module),
+            key=lambda item: item[1], reverse=True,
+        )
+        for name, cumulative in slowest[:args.top]:
+            print(f"  {cumulative / 1e3:>9.1f} ms  {name}")
+        if budget and total_ms > budget * budget_scale():
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"over budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""任务提交链路的端到端压测
+
+在 local profile 下(内存 broker/backend + SQLite + 进程内 worker)启动真实的 uvicorn 服务,
+按指定并发驱动 /inference_sim_tasks/create 与 /run/{id},统计各阶段的吞吐与 p50/p95/p99 延迟:
+
+- http_create / http_run: 客户端观测到的 HTTP 延迟
+- db_query: 单条 SQL 的执行耗时(SQLAlchemy 引擎事件)
+- broker_publish: 发布任务消息的耗时(before/after_task_publish)
+- queue_wait: 消息发布完成到 worker 开始执行(after_task_publish -> task_prerun)
+- execution: 任务执行耗时(task_prerun -> task_postrun)
+- end_to_end: 发起 run 请求到任务执行完成
+
+结果以 JSON 保存,可以用 --compare 与历史结果对比,超过阈值时以非 0 退出码结束:
+
+    python -m benchmarks.pipeline --tasks 200 --concurrency 16
+    python -m benchmarks.pipeline --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# 参与回归对比的统计量
+COMPARED_STATS = ("p50", "p95", "p99")
+
+
+class StageRecorder:
+    """线程安全地记录各阶段耗时(秒)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def summary(self, wall_seconds):
+        stages = {}
+        with self.lock:
+            for stage, values in sorted(self.samples.items()):
+                data = np.asarray(values) * 1e3
+                p50, p95, p99 = np.percentile(data, [50, 95, 99])
+                stages[stage] = {
+                    "count": int(data.size),
+                    "throughput_per_s": data.size / wall_seconds if wall_seconds else 0.0,
+                    "mean": float(data.mean()),
+                    "p50": float(p50),
+                    "p95": float(p95),
+                    "p99": float(p99),
+                    "max": float(data.max()),
+                }
+        return stages
+
+
+def install_probes(recorder, engine):
+    """挂载 SQLAlchemy 与 Celery 信号探针,采集服务端各阶段耗时"""
+    from celery import signals
+    from sqlalchemy import event
+
+    published = {}
+    started = {}
+    # task_id -> 执行完成时间;任务可能在 /run 返回之前就执行完,end_to_end 在压测结束后再匹配
+    finished = {}
+    done = threading.Semaphore(0)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        recorder.add("db_query", time.perf_counter() - conn.info["bench_query_start"].pop())
+
+    @signals.before_task_publish.connect(weak=False)
+    def before_task_publish(headers=None, **kwargs):
+        published[headers["id"]] = time.perf_counter()
+
+    @signals.after_task_publish.connect(weak=False)
+    def after_task_publish(headers=None, **kwargs):
+        now = time.perf_counter()
+        task_id = headers["id"]
+        recorder.add("broker_publish", now - published[task_id])
+        published[task_id] = now
+
+    @signals.task_prerun.connect(weak=False)
+    def task_prerun(task_id=None, **kwargs):
+        now = time.perf_counter()
+        started[task_id] = now
+        if task_id in published:
+            recorder.add("queue_wait", now - published.pop(task_id))
+
+    @signals.task_postrun.connect(weak=False)
+    def task_postrun(task_id=None, **kwargs):
+        now = time.perf_counter()
+        if task_id in started:
+            recorder.add("execution", now - started.pop(task_id))
+        finished[task_id] = now
+        done.release()
+
+    return finished, done
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True, name="BenchmarkServer")
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("benchmark server failed to start")
+        time.sleep(0.01)
+    return server, thread
+
+
+def run_load(port, tasks, concurrency, recorder, submitted):
+    """按指定并发执行 create + run,submitted 记录 celery 任务 id -> 发起 run 请求的时间,返回压测墙钟时间"""
+    local = threading.local()
+    prefix = uuid.uuid4().hex[:8]
+
+    def post(path, body=None):
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        local.conn.request("POST", path, body=payload, headers={"Content-Type": "application/json"})
+        response = local.conn.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"POST {path} failed: {response.status} {data[:200]!r}")
+        return json.loads(data)
+
+    def one(index):
+        name = f"bench-{prefix}-{index}"
+        body = {
+            "name": name,
+            "model_config_": {"name": f"{name}-model", "type": "llm", "params": {"layers": 32}},
+            "system_config": {"name": f"{name}-system", "type": "gpu", "params": {"devices": 8}},
+            "runtime_config": {"name": f"{name}-runtime", "params": {"batch_size": 16}},
+        }
+        start = time.perf_counter()
+        task = post("/inference_sim_tasks/create", body)
+        recorder.add("http_create", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        task = post(f"/inference_sim_tasks/run/{task['id']}")
+        recorder.add("http_run", time.perf_counter() - start)
+        submitted[task["celery_task_id"]] = start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(tasks)))
+    return time.perf_counter() - start
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline, max_regression, min_delta_ms):
+    """逐阶段对比延迟分位数,返回超过阈值的回归项(亚毫秒级的抖动不计入)"""
+    regressions = []
+    print(f"{'stage':<16}{'stat':<6}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for stage, stats in current["stages"].items():
+        base_stats = baseline["stages"].get(stage)
+        if not base_stats:
+            continue
+        for stat in COMPARED_STATS:
+            base, cur = base_stats[stat], stats[stat]
+            change = (cur - base) / base if base else 0.0
+            regressed = change > max_regression and cur - base > min_delta_ms
+            flag = " !" if regressed else ""
+            print(f"{stage:<16}{stat:<6}{base:>14.3f}{cur:>14.3f}{change:>+9.1%}{flag}")
+            if regressed:
+                regressions.append((stage, stat, base, cur))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the task submission pipeline against local stand-ins.")
+    parser.add_argument("--tasks", type=int, default=100, help="number of create + run pairs")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument("--worker-concurrency", type=int, default=4, help="in-process worker threads")
+    parser.add_argument("--exec-seconds", type=float, default=0.01, help="stand-in engine execution time per run_task")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for all tasks to finish")
+    parser.add_argument("--output", type=Path, default=None, help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline result file to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative slowdown before failing")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this many ms")
+    args = parser.parse_args(argv)
+
+    os.environ["APP_PROFILE"] = "local"
+    workdir = tempfile.TemporaryDirectory(prefix="fastapi-celery-bench-")
+
+    from app.core.config import override_config
+    from app.core.dependencies import Container
+
+    override_config({
+        "db": {"url": f"sqlite:///{workdir.name}/bench.db", "echo": False},
+        "celery": {"worker_concurrency": args.worker_concurrency},
+    })
+
+    from app.api.main import fastapi_app
+    from app.worker import engine_pool
+
+    # 用固定耗时的替身代替引擎执行,便于聚焦调度链路本身的开销;
+    # run_task 的数据库读写仍然计入 execution
+    exec_seconds = args.exec_seconds
+    stub_calls = []
+
+    def run_configs(name, configs, on_progress=None, job_id=None):
+        stub_calls.append(name)
+        time.sleep(exec_seconds)
+        return {key: {"exit_code": 0, "message": "", "result": config} for key, config in configs.items()}
+
+    engine_pool.run_configs = run_configs
+
+    recorder = StageRecorder()
+    finished, done = install_probes(recorder, Container.db()._engine)
+    submitted = {}
+
+    server, thread = start_server(fastapi_app, free_port())
+    try:
+        port = server.servers[0].sockets[0].getsockname()[1]
+        start = time.perf_counter()
+        load_seconds = run_load(port, args.tasks, args.concurrency, recorder, submitted)
+        deadline = time.monotonic() + args.timeout
+        for _ in range(args.tasks):
+            if not done.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise TimeoutError(f"tasks did not finish within {args.timeout}s")
+        wall_seconds = time.perf_counter() - start
+        # 替身没有被调用时,execution/end_to_end 测到的不是声明的执行耗时
+        assert len(stub_calls) == args.tasks, f"engine stand-in ran {len(stub_calls)} times, expected {args.tasks}"
+        for task_id, submitted_at in submitted.items():
+            recorder.add("end_to_end", finished[task_id] - submitted_at)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+        workdir.cleanup()
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        },
+        "throughput": {
+            "http_requests_per_s": 2 * args.tasks / load_seconds,
+            "tasks_per_s": args.tasks / wall_seconds,
+        },
+        "stages": recorder.summary(wall_seconds),
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{result['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    print(f"{'stage':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<16}{stats['count']:>8}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}")
+    print(f"http: {result['throughput']['http_requests_per_s']:.1f} req/s, tasks: {result['throughput']['tasks_per_s']:.1f} tasks/s")
+    print(f"saved to {output}")
+
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.max_regression:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,43 +4,173 @@ import json
 import sys
 import os
 
-def main():
-    parser = argparse.ArgumentParser(description='Process JSON configuration file.')
-    parser.add_argument('-cmd', required=True, choices=['pd'], help='Specify the command (must be "pd")')
-    parser.add_argument('-c', '--config', required=True, help='Path to input JSON config file')
-    parser.add_argument('-o', '--output', default='out.json', help='Output JSON file path (default: out.json)')
-    
-    args = parser.parse_args()
-    
+from json_io import BACKENDS, dump_json, load_json, stream_reformat
+
+# 超过该大小的配置默认走流式读写，不整体载入内存
+STREAM_THRESHOLD = 256 * 1024 * 1024
+# 请求中可以携带的处理选项，与命令行参数对应
+OPTIONS = ('compact', 'json_backend', 'stream')
+
+def process_config(config, output, compact=False, json_backend='auto', stream=None):
+    """处理单个配置文件，返回 (退出码, 提示信息)
+
+    compact 时输出不含空白；stream 为 None 时按文件大小（STREAM_THRESHOLD）决定是否流式处理。
+    """
     try:
-        # 读取输入的JSON文件
-        with open(args.config, 'r') as f:
-            data = json.load(f)
-        
         # 确保输出目录存在
-        output_dir = os.path.dirname(args.output)
+        output_dir = os.path.dirname(output)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
-        
-        # 将数据写入输出文件
-        with open(args.output, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"Success: Processed {args.config} -> {args.output}")
-        return 0
-    
+
+        if stream is None:
+            stream = os.path.getsize(config) > STREAM_THRESHOLD
+        if stream:
+            # 边读边写到临时文件，校验通过后再替换，非法输入不会留下半个输出文件
+            partial = output + '.partial'
+            try:
+                with open(config, 'r') as src, open(partial, 'w') as dst:
+                    stream_reformat(src, dst, compact=compact)
+                os.replace(partial, output)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        else:
+            dump_json(load_json(config, json_backend), output, compact=compact, backend=json_backend)
+
+        return 0, f"Success: Processed {config} -> {output}"
+
     except FileNotFoundError:
-        print(f"Error: Config file not found at {args.config}", file=sys.stderr)
-        return 1
+        return 1, f"Error: Config file not found at {config}"
     except json.JSONDecodeError:
-        print(f"Error: Invalid JSON format in {args.config}", file=sys.stderr)
-        return 2
+        return 2, f"Error: Invalid JSON format in {config}"
     except PermissionError:
-        print(f"Error: Permission denied for {args.output}", file=sys.stderr)
-        return 3
+        return 3, f"Error: Permission denied for {output}"
     except Exception as e:
-        print(f"Unexpected error: {str(e)}", file=sys.stderr)
-        return 4
+        return 4, f"Unexpected error: {str(e)}"
+
+def emit_progress(stream, **progress):
+    """输出一行进度 `PROGRESS {json}`，调用方可据此实时转发进度"""
+    stream.write("PROGRESS " + json.dumps(progress) + "\n")
+    stream.flush()
+
+def process_batch(items, on_result=None, on_progress=None, **options):
+    """依次处理多个 {"config", "output"}，返回 (退出码, 每项结果列表)；退出码为第一个失败项的退出码
+
+    每完成一项调用 on_result(结果) 与 on_progress(done=, total=, config=)；options 传给 process_config。
+    """
+    results = []
+    for item in items:
+        exit_code, message = process_config(item['config'], item.get('output', 'out.json'), **options)
+        result = {"config": item['config'], "output": item.get('output', 'out.json'),
+                  "exit_code": exit_code, "message": message}
+        results.append(result)
+        if on_result:
+            on_result(result)
+        if on_progress:
+            on_progress(done=len(results), total=len(items), config=item['config'])
+    batch_exit_code = next((result["exit_code"] for result in results if result["exit_code"] != 0), 0)
+    return batch_exit_code, results
+
+def load_manifest(manifest):
+    """读取批处理清单：[{"config": ..., "output": ...}, ...]"""
+    with open(manifest, 'r') as f:
+        items = json.load(f)
+    if not isinstance(items, list) or not all(isinstance(item, dict) and 'config' in item for item in items):
+        raise ValueError("manifest must be a list of {\"config\", \"output\"} objects")
+    return items
+
+def handle_request(request, on_progress=None, defaults=None):
+    """处理 serve 模式下的一条请求，返回响应（不含 id）；请求带 "progress": true 时通过 on_progress 报告进度
+
+    请求中的 compact / json_backend / stream 覆盖启动 serve 时的命令行选项 defaults。
+    """
+    if not request.get('progress'):
+        on_progress = None
+    options = {**(defaults or {}), **{key: request[key] for key in OPTIONS if key in request}}
+    if request.get('cmd') == 'pd':
+        exit_code, message = process_config(request['config'], request.get('output', 'out.json'), **options)
+        return {"exit_code": exit_code, "output": message}
+    if request.get('cmd') == 'batch':
+        exit_code, results = process_batch(request['items'], on_progress=on_progress, **options)
+        return {"exit_code": exit_code, "output": f"Processed {len(results)} configs", "results": results}
+    if request.get('cmd') == 'ping':
+        return {"exit_code": 0, "output": "pong"}
+    return {"exit_code": 4, "output": f"Unexpected error: unsupported cmd {request.get('cmd')!r}"}
+
+def serve(stdin, stdout, **defaults):
+    """常驻模式：从 stdin 逐行读取 JSON 请求，向 stdout 逐行写出 JSON 响应，直到 stdin 关闭
+
+    请求: {"id": ..., "cmd": "pd", "config": ..., "output": ...}
+          {"id": ..., "cmd": "batch", "items": [{"config": ..., "output": ...}, ...]}
+    响应: {"id": ..., "exit_code": ..., "output": ...}，batch 另带每项结果 "results"
+    请求带 "progress": true 时，响应之前先输出若干行进度 {"id": ..., "progress": {...}}
+    进程在多个任务间复用，省去每个任务启动解释器与导入模块的开销
+    """
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            def on_progress(**progress):
+                stdout.write(json.dumps({"id": request.get('id'), "progress": progress}) + "\n")
+                stdout.flush()
+            response = handle_request(request, on_progress, defaults)
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            request, response = {}, {"exit_code": 2, "output": f"Error: Invalid request: {str(e)}"}
+        stdout.write(json.dumps({"id": request.get('id'), **response}) + "\n")
+        stdout.flush()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Process JSON configuration file.')
+    parser.add_argument('-cmd', required=True, choices=['pd', 'batch', 'serve'],
+                        help='Specify the command ("pd", "batch" or "serve")')
+    parser.add_argument('-c', '--config', help='Path to input JSON config file (required by "pd")')
+    parser.add_argument('-o', '--output', default='out.json', help='Output JSON file path (default: out.json)')
+    parser.add_argument('-m', '--manifest', help='Path to batch manifest, a JSON list of {"config", "output"} (required by "batch")')
+    parser.add_argument('--progress', action='store_true', help='Emit "PROGRESS {json}" lines to stderr (batch)')
+    parser.add_argument('--compact', action='store_true', help='Write output without indentation or whitespace')
+    parser.add_argument('--json-backend', default='auto', choices=BACKENDS,
+                        help='JSON library for whole-document reads/writes (default: orjson if installed)')
+    stream_group = parser.add_mutually_exclusive_group()
+    stream_group.add_argument('--stream', dest='stream', action='store_true', default=None,
+                              help='Reformat incrementally without loading the whole config '
+                                   f'(default: only above {STREAM_THRESHOLD // (1024 * 1024)} MiB)')
+    stream_group.add_argument('--no-stream', dest='stream', action='store_false', help='Always load the whole config')
+
+    args = parser.parse_args()
+    options = {"compact": args.compact, "json_backend": args.json_backend, "stream": args.stream}
+
+    if args.cmd == 'serve':
+        return serve(sys.stdin, sys.stdout, **options)
+
+    if args.cmd == 'batch':
+        if not args.manifest:
+            parser.error('the following arguments are required: -m/--manifest')
+        try:
+            items = load_manifest(args.manifest)
+        except FileNotFoundError:
+            print(f"Error: Manifest file not found at {args.manifest}", file=sys.stderr)
+            return 1
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error: Invalid manifest {args.manifest}: {str(e)}", file=sys.stderr)
+            return 2
+        # 每处理完一项输出一行 `RESULT {json}`，中途被终止时调用方仍能拿到已完成的部分
+        exit_code, _ = process_batch(
+            items,
+            on_result=lambda result: print("RESULT " + json.dumps(result), flush=True),
+            on_progress=(lambda **progress: emit_progress(sys.stderr, **progress)) if args.progress else None,
+            **options,
+        )
+        return exit_code
+
+    if not args.config:
+        parser.error('the following arguments are required: -c/--config')
+
+    exit_code, message = process_config(args.config, args.output, **options)
+    print(message, file=sys.stdout if exit_code == 0 else sys.stderr)
+    return exit_code
 
 if __name__ == '__main__':
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# json_io.py
+"""引擎的 JSON 读写
+
+- 整体读写：load_json / dump_json，可选 orjson 后端（未安装或解析失败时回退到标准库）
+- 流式读写：stream_reformat 按块读取输入、逐个词法单元校验并重新格式化输出，内存占用与文档大小无关，
+  输出与 json.load + json.dump 一致（重复的键会原样保留，而不是只保留最后一个）
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # 镜像中没有 orjson 时使用标准库
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+CHUNK_SIZE = 1 << 20
+
+
+def resolve_backend(name):
+    """auto 在安装了 orjson 时使用 orjson"""
+    if name == 'orjson' and orjson is None:
+        raise ValueError("orjson is not installed")
+    if name == 'auto':
+        return 'orjson' if orjson is not None else 'stdlib'
+    return name
+
+
+def load_json(path, backend='auto'):
+    """读取整个 JSON 文件；orjson 不支持的输入（NaN、超过 64 位的整数等）回退到标准库解析"""
+    if resolve_backend(backend) == 'orjson':
+        with open(path, 'rb') as f:
+            content = f.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return json.loads(content)
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def dump_json(data, path, compact=False, backend='auto'):
+    """写出 JSON；默认 4 空格缩进，compact 时不含任何空白
+
+    orjson 只支持 2 空格缩进，缩进输出始终由标准库生成，保持格式不变。
+    """
+    if compact and resolve_backend(backend) == 'orjson':
+        try:
+            content = orjson.dumps(data)
+        except (TypeError, orjson.JSONEncodeError):  # NaN 以外的非标准值交给标准库
+            content = None
+        if content is not None:
+            with open(path, 'wb') as f:
+                f.write(content)
+            return
+    with open(path, 'w') as f:
+        if compact:
+            # 不缩进时 json.dumps 使用 C 编码器，比逐块写出的 json.dump 快数倍
+            f.write(json.dumps(data, separators=(',', ':')))
+        else:
+            json.dump(data, f, indent=4)
+
+
+# 跳过空白后匹配一个词法单元：标点 / 字符串 / 数字 / 字面量
+_TOKEN = re.compile(
+    r'[ \t\n\r]*(?:'
+    r'([{}\[\]:,])'
+    r'|("[^"\\]*(?:\\.[^"\\]*)*")'
+    r'|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)'
+    r'|(true|false|null|NaN|Infinity|-Infinity)'
+    r')'
+)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 无需转义的字符串与整数，json.dumps(json.loads(x)) == x，可以原样写出
+_PLAIN_STRING = re.compile(r'"[\x20\x21\x23-\x5b\x5d-\x7e]*"')
+_PLAIN_INT = re.compile(r'-?[1-9]\d*|0')
+
+
+# 词法单元类型，即 _TOKEN 中对应分组的序号
+PUNCT, STRING, NUMBER, LITERAL = 1, 2, 3, 4
+
+
+def _tokens(src, chunk_size):
+    """从文本流中逐个产生 (类型, 文本)，类型为 PUNCT / STRING / NUMBER / LITERAL"""
+    buffer, pos, eof = '', 0, False
+    # 词法单元可能被块边界截断（未闭合的字符串，或数字、字面量只读到前半段，如 "1." 或 "tr"），
+    # 结束位置离缓冲区末尾不足 16 个字符时先补充数据再匹配
+    limit = -1
+    while True:
+        match = _TOKEN.match(buffer, pos)
+        if match is not None and (eof or match.end() < limit):
+            pos = match.end()
+            kind = match.lastindex
+            yield kind, match.group(kind)
+            continue
+        if not eof:
+            start = _WHITESPACE.match(buffer, pos).end()
+            # 明显非法的字符不必读到文件末尾
+            if match is not None or start == len(buffer) or buffer[start] == '"' or len(buffer) - start < 16:
+                chunk = src.read(chunk_size)
+                if chunk:
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    limit = len(buffer) - 16
+                else:
+                    eof = True
+                continue
+        if match is None:
+            if _WHITESPACE.match(buffer, pos).end() == len(buffer):
+                return
+            raise json.JSONDecodeError("Unexpected character", buffer, pos)
+
+
+def _normalize(kind, token):
+    """值经标准库往返，转义与数字格式与 json.dump 完全一致；常见的简单值直接原样写出"""
+    if kind == LITERAL:
+        return token
+    if (_PLAIN_STRING if kind == STRING else _PLAIN_INT).fullmatch(token):
+        return token
+    return json.dumps(json.loads(token))
+
+
+def stream_reformat(src, dst, compact=False, chunk_size=CHUNK_SIZE):
+    """把文本流 src 中的 JSON 校验并重新格式化写入 dst，格式与 dump_json 相同；非法输入抛出 JSONDecodeError"""
+    indent = None if compact else 4
+    key_separator = ':' if compact else ': '
+    stack = []  # 每层容器的 [括号, 已写出的元素数]
+    expect = 'value'  # value / value_or_close / key / key_or_close / colon / comma_or_close / end
+    after_colon = False
+
+    def newline():
+        if indent is not None:
+            dst.write('\n' + ' ' * (indent * len(stack)))
+
+    def begin_value():
+        nonlocal after_colon
+        if after_colon:
+            after_colon = False
+        elif stack:
+            newline()
+
+    def end_value():
+        nonlocal expect
+        if stack:
+            stack[-1][1] += 1
+            expect = 'comma_or_close'
+        else:
+            expect = 'end'
+
+    def error(token):
+        return json.JSONDecodeError(f"Unexpected token {token[:20]!r}", token, 0)
+
+    for kind, token in _tokens(src, chunk_size):
+        if expect == 'end':
+            raise error(token)
+        if kind == PUNCT and token in ']}':
+            closes = {']': 'value_or_close', '}': 'key_or_close'}[token]
+            if not stack or stack[-1][0] != {']': '[', '}': '{'}[token] or expect not in (closes, 'comma_or_close'):
+                raise error(token)
+            _, count = stack.pop()
+            if count:
+                newline()
+            dst.write(token)
+            end_value()
+        elif expect in ('value', 'value_or_close'):
+            if kind == PUNCT and token in '[{':
+                begin_value()
+                dst.write(token)
+                stack.append([token, 0])
+                expect = 'value_or_close' if token == '[' else 'key_or_close'
+            elif kind != PUNCT:
+                begin_value()
+                dst.write(_normalize(kind, token))
+                end_value()
+            else:
+                raise error(token)
+        elif expect in ('key', 'key_or_close'):
+            if kind != STRING:
+                raise error(token)
+            begin_value()
+            dst.write(_normalize(kind, token))
+            expect = 'colon'
+        elif expect == 'colon':
+            if token != ':':
+                raise error(token)
+            dst.write(key_separator)
+            after_colon = True
+            expect = 'value'
+        elif expect == 'comma_or_close':
+            if token != ',':
+                raise error(token)
+            dst.write(',')
+            expect = 'value' if stack[-1][0] == '[' else 'key'
+    if expect != 'end':
+        raise json.JSONDecodeError("Unexpected end of document", '', 0)
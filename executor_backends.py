@@ -0,0 +1,661 @@
+# executor_backends.py
+"""ContainerPool 的执行后端
+
+后端负责启动/停止"容器"（执行单元）并在其中执行引擎命令，池的获取/归还、预热、健康状态与指标
+由 ContainerPool 统一实现，三种后端共享同一套语义：
+
+- DockerBackend: 每个执行单元是一个 Docker 容器（默认行为）
+- LocalProcessBackend: 执行单元只是一个并发名额，每次执行直接以子进程运行 engine/app.py，
+  适合不需要隔离的主机上运行小配置，或在没有 Docker 的环境下压测池的调度
+- FakeBackend: 纯内存实现，执行耗时、失败与事件都可控，用于测试
+
+后端还可以提供引擎会话（open_session）：在执行单元内常驻一个 `app.py -cmd serve` 进程，
+通过 stdin/stdout 的 JSON 行协议提交任务，省去每个任务启动解释器的开销。
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import queue
+import selectors
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+ENGINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine")
+
+
+# exec 输出在内存中保留的上限（字节），超出部分只保留末尾
+DEFAULT_OUTPUT_LIMIT = 1024 * 1024
+# 子进程组收到 SIGTERM 后的退出期限（秒），超时后 SIGKILL
+TERMINATE_TIMEOUT = 5.0
+
+
+def terminate_process_group(process, timeout=TERMINATE_TIMEOUT):
+    """终止以 start_new_session 启动的子进程及其进程组并回收，SIGTERM 超时后 SIGKILL"""
+    if process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+
+class OutputBuffer:
+    """按行接收分流（stdout/stderr）的 exec 输出，内存占用有上限
+
+    每一行先交给 on_line(stream, line)，返回 True 表示已被消费（如进度行）、不再保留；
+    其余行按到达顺序保留，总量超过 limit 时丢弃最早的行，getvalue() 时以一行说明代替。
+    """
+
+    def __init__(self, limit=DEFAULT_OUTPUT_LIMIT, on_line=None):
+        self.limit = limit
+        self.on_line = on_line
+        self._partial = {"stdout": b"", "stderr": b""}
+        self._lines = deque()
+        self._size = 0
+        self.truncated = 0
+
+    def feed(self, stream, data):
+        if not data:
+            return
+        lines = (self._partial[stream] + data).split(b"\n")
+        self._partial[stream] = lines.pop()
+        for line in lines:
+            self._add(stream, line + b"\n")
+        # 没有换行的超长输出不再等待行尾
+        if len(self._partial[stream]) > self.limit:
+            self._add(stream, self._partial[stream])
+            self._partial[stream] = b""
+
+    def _add(self, stream, line):
+        if self.on_line is not None and self.on_line(stream, line.rstrip(b"\n").decode("utf-8", "replace")):
+            return
+        self._lines.append(line)
+        self._size += len(line)
+        while self._size > self.limit and len(self._lines) > 1:
+            dropped = self._lines.popleft()
+            self._size -= len(dropped)
+            self.truncated += len(dropped)
+
+    def close(self):
+        """输出结束，处理未以换行结尾的最后一行"""
+        for stream, partial in self._partial.items():
+            if partial:
+                self._add(stream, partial)
+                self._partial[stream] = b""
+
+    def getvalue(self):
+        self.close()
+        prefix = f"[{self.truncated} bytes of output truncated]\n".encode() if self.truncated else b""
+        return prefix + b"".join(self._lines)
+
+
+class EngineSessionError(RuntimeError):
+    """引擎会话已断开（进程退出或被终止）"""
+
+
+class EngineSession:
+    """与常驻引擎进程的会话，同一时间只处理一个请求"""
+
+    def request(self, payload, on_progress=None):
+        """发送一条请求并等待响应，会话断开时抛出 EngineSessionError
+
+        传入 on_progress 时请求进度，引擎在响应前输出的进度行逐条交给 on_progress(dict)。
+        不是本请求消息的行（引擎或依赖库误写到 stdout 的内容）被跳过，不会中断会话。
+        """
+        if on_progress is not None:
+            payload = {**payload, "progress": True}
+        self._send((json.dumps(payload) + "\n").encode("utf-8"))
+        while True:
+            line = self._read_line()
+            if not line:
+                raise EngineSessionError("engine session closed")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            # 无法解析的请求由引擎以 id 为 null 的响应回答
+            if not isinstance(message, dict) or message.get("id") not in (payload.get("id"), None) \
+                    or not ("progress" in message or "exit_code" in message):
+                continue
+            if "progress" not in message:
+                return message
+            if on_progress is not None:
+                on_progress(message["progress"])
+
+    def _send(self, data):
+        raise NotImplementedError
+
+    def _read_line(self):
+        raise NotImplementedError
+
+    def close(self):
+        """终止常驻进程，正在等待的 request 随之抛出 EngineSessionError"""
+        raise NotImplementedError
+
+
+class ProcessEngineSession(EngineSession):
+    """通过子进程的 stdin/stdout 通信"""
+
+    def __init__(self, process):
+        self.process = process
+
+    def _send(self, data):
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            raise EngineSessionError(f"engine session closed: {str(e)}") from e
+
+    def _read_line(self):
+        return self.process.stdout.readline()
+
+    def close(self):
+        terminate_process_group(self.process)
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class DockerEngineSession(EngineSession):
+    """通过 exec 的 attach socket 通信，stdout 为 Docker 的多路复用帧格式"""
+
+    def __init__(self, backend, container, command):
+        from docker.utils.socket import STDOUT
+
+        self._stdout = STDOUT
+        self.backend = backend
+        self.container = container
+        self.pid_file = f"/tmp/engine-serve-{uuid.uuid4().hex}.pid"
+        api = backend.client.api
+        exec_id = api.exec_create(
+            container.id,
+            ["sh", "-c", f"echo $$ > {self.pid_file}; exec {shlex.join(command)}"],
+            stdin=True, stdout=True, stderr=False,
+        )["Id"]
+        self._socket = api.exec_start(exec_id, socket=True)
+        # exec_start 返回 SocketIO，写入需要使用底层 socket
+        self._raw = getattr(self._socket, "_sock", self._socket)
+        self._buffer = b""
+
+    def _send(self, data):
+        try:
+            self._raw.sendall(data)
+        except OSError as e:
+            raise EngineSessionError(f"engine session closed: {str(e)}") from e
+
+    def _read_line(self):
+        from docker.utils.socket import next_frame_header, read_exactly, SocketError
+
+        while b"\n" not in self._buffer:
+            try:
+                stream, size = next_frame_header(self._socket)
+                if size < 0:
+                    return b""
+                data = read_exactly(self._socket, size)
+            except (OSError, SocketError):
+                return b""
+            if stream == self._stdout:
+                self._buffer += data
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line
+
+    def close(self):
+        try:
+            self.container.exec_run(
+                ["sh", "-c", f"[ -f {self.pid_file} ] && kill -TERM $(cat {self.pid_file}); rm -f {self.pid_file}"]
+            )
+        finally:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+
+
+class ExecutorBackend:
+    """执行后端接口"""
+
+    name: str
+
+    def start_worker(self, labels):
+        """启动一个执行单元并返回其句柄（必须有 id 属性），不等待就绪"""
+        raise NotImplementedError
+
+    def stop_worker(self, worker):
+        """停止并移除执行单元"""
+        raise NotImplementedError
+
+    def events(self, labels):
+        """订阅带有 labels 的执行单元的事件，返回可迭代且可 close() 的事件流；不支持事件时返回 None
+
+        事件为 {"Action": "start" | "die" | ..., "id": <worker id>} 形式的字典（与 Docker 事件一致）
+        """
+        return None
+
+    def is_running(self, worker):
+        """向后端查询执行单元是否在运行（没有事件流时的就绪检查）"""
+        raise NotImplementedError
+
+    def list_workers(self, labels):
+        """返回带有 labels 的执行单元 {id: 是否在运行}，用于校正池内的健康状态"""
+        raise NotImplementedError
+
+    def engine_command(self):
+        """执行单元内运行引擎的命令前缀"""
+        raise NotImplementedError
+
+    def input_path(self, name):
+        """输入文件在执行单元内的路径"""
+        raise NotImplementedError
+
+    def output_path(self, name):
+        """输出文件在执行单元内的路径"""
+        raise NotImplementedError
+
+    def engine_digest(self):
+        """引擎版本的摘要（如镜像 id），引擎变化时随之变化，用作结果缓存键的一部分；未知时返回 None"""
+        return None
+
+    def staging_path(self, host_path):
+        """主机暂存目录（ContainerConfig.staging_dir）中的文件在执行单元内的路径，默认与主机路径相同"""
+        return host_path
+
+    def exec(self, worker, argv, job_id, on_line=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+        """在执行单元内同步执行命令，返回 (exit_code, output bytes)
+
+        输出按行流式读取（见 OutputBuffer）：on_line(stream, line) 实时收到每一行，
+        返回 True 的行不计入输出；保留的输出不超过 output_limit 字节。
+        """
+        raise NotImplementedError
+
+    def kill(self, worker, job_id):
+        """终止执行单元内正在执行的任务"""
+        raise NotImplementedError
+
+    def open_session(self, worker):
+        """在执行单元内启动常驻引擎（app.py -cmd serve）并返回 EngineSession；不支持时返回 None"""
+        return None
+
+
+class DockerBackend(ExecutorBackend):
+    """每个执行单元是一个挂载了输入/输出目录的 Docker 容器"""
+
+    name = "docker"
+
+    def __init__(self, config, input_dir, output_dir, client=None):
+        if client is None:
+            # docker SDK 导入较慢,只在真正使用 Docker 后端时才导入
+            import docker
+
+            client = docker.from_env()
+        self.client = client
+        self.config = config
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+
+    @staticmethod
+    def _label_filter(labels):
+        return [f"{key}={value}" for key, value in labels.items()]
+
+    def start_worker(self, labels):
+        volumes = {
+            self.input_dir: {'bind': self.config.input_mount, 'mode': 'ro'},
+            self.output_dir: {'bind': self.config.output_mount, 'mode': 'rw'}
+        }
+        if self.config.staging_dir:
+            # 主机上的 tmpfs 暂存目录，process_data 的输入输出不经过磁盘
+            volumes[self.config.staging_dir] = {'bind': self.config.staging_mount, 'mode': 'rw'}
+        return self.client.containers.run(
+            image=self.config.image,
+            volumes=volumes,
+            labels=labels,
+            detach=True
+        )
+
+    def stop_worker(self, worker):
+        # 设置较短的停止超时时间（2秒）
+        worker.stop(timeout=2)
+        worker.remove()
+
+    def events(self, labels):
+        return self.client.events(decode=True, filters={"type": "container", "label": self._label_filter(labels)})
+
+    def is_running(self, worker):
+        worker.reload()
+        return worker.status == 'running'
+
+    def list_workers(self, labels):
+        containers = self.client.containers.list(all=True, sparse=True, filters={"label": self._label_filter(labels)})
+        return {container.id: container.status == 'running' for container in containers}
+
+    def engine_command(self):
+        return ["python", "app.py"]
+
+    def input_path(self, name):
+        return f"{self.config.input_mount}/{name}"
+
+    def output_path(self, name):
+        return f"{self.config.output_mount}/{name}"
+
+    def engine_digest(self):
+        return self.client.images.get(self.config.image).id
+
+    def staging_path(self, host_path):
+        relative = os.path.relpath(host_path, self.config.staging_dir)
+        return f"{self.config.staging_mount}/{relative}"
+
+    def _pid_file(self, job_id):
+        return f"/tmp/job-{job_id}.pid"
+
+    def exec(self, worker, argv, job_id, on_line=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+        # 记录容器内进程的 pid 以便取消时终止
+        api = self.client.api
+        exec_id = api.exec_create(
+            worker.id, ["sh", "-c", f"echo $$ > {self._pid_file(job_id)}; exec {shlex.join(argv)}"],
+            stdout=True, stderr=True,
+        )["Id"]
+        output = OutputBuffer(output_limit, on_line)
+        for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+            output.feed("stdout", stdout)
+            output.feed("stderr", stderr)
+        return api.exec_inspect(exec_id)["ExitCode"], output.getvalue()
+
+    def kill(self, worker, job_id):
+        """根据 pid 文件杀掉容器内的任务进程"""
+        pid_file = self._pid_file(job_id)
+        worker.exec_run(["sh", "-c", f"[ -f {pid_file} ] && kill -TERM $(cat {pid_file}); rm -f {pid_file}"])
+
+    def open_session(self, worker):
+        return DockerEngineSession(self, worker, self.engine_command() + ["-cmd", "serve"])
+
+
+@dataclass
+class LocalWorker:
+    """本地执行单元：一个并发名额"""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    labels: dict = field(default_factory=dict)
+    running: bool = True
+
+
+class LocalProcessBackend(ExecutorBackend):
+    """直接在本机以子进程运行 engine/app.py，输入/输出使用宿主机路径"""
+
+    name = "local"
+
+    def __init__(self, input_dir, output_dir, engine_dir=ENGINE_DIR, python=sys.executable):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.engine_dir = engine_dir
+        self.python = python
+        self._lock = threading.Lock()
+        self._workers = {}
+        self._processes = {}  # job_id -> Popen
+
+    def start_worker(self, labels):
+        worker = LocalWorker(labels=dict(labels))
+        with self._lock:
+            self._workers[worker.id] = worker
+        return worker
+
+    def stop_worker(self, worker):
+        worker.running = False
+        with self._lock:
+            self._workers.pop(worker.id, None)
+
+    def is_running(self, worker):
+        return worker.running
+
+    def list_workers(self, labels):
+        with self._lock:
+            return {
+                worker.id: worker.running
+                for worker in self._workers.values()
+                if labels.items() <= worker.labels.items()
+            }
+
+    def engine_command(self):
+        return [self.python, os.path.join(self.engine_dir, "app.py")]
+
+    def input_path(self, name):
+        return os.path.join(self.input_dir, name)
+
+    def output_path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def engine_digest(self):
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(self.engine_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode("utf-8") + b"\0")
+                with open(os.path.join(self.engine_dir, name), "rb") as f:
+                    digest.update(f.read())
+        return f"sha256:{digest.hexdigest()}"
+
+    def exec(self, worker, argv, job_id, on_line=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+        # 独立的进程组，取消时连同引擎派生的子进程一起终止
+        process = subprocess.Popen(
+            argv, cwd=self.engine_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+        )
+        with self._lock:
+            self._processes[job_id] = process
+        try:
+            output = OutputBuffer(output_limit, on_line)
+            with selectors.DefaultSelector() as selector:
+                selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+                selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+                while selector.get_map():
+                    for key, _ in selector.select():
+                        data = os.read(key.fileobj.fileno(), 65536)
+                        if data:
+                            output.feed(key.data, data)
+                        else:
+                            selector.unregister(key.fileobj)
+                            key.fileobj.close()
+            return process.wait(), output.getvalue()
+        except BaseException:
+            # 撤销、软时限或 KeyboardInterrupt 中断了执行，调用方随后的 kill 已找不到该进程，这里直接终止
+            terminate_process_group(process)
+            raise
+        finally:
+            with self._lock:
+                self._processes.pop(job_id, None)
+
+    def kill(self, worker, job_id):
+        with self._lock:
+            process = self._processes.get(job_id)
+        if process is not None and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def open_session(self, worker):
+        process = subprocess.Popen(
+            self.engine_command() + ["-cmd", "serve"],
+            cwd=self.engine_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return ProcessEngineSession(process)
+
+
+class _FakeEventStream:
+    def __init__(self, backend, labels):
+        self.backend = backend
+        self.labels = dict(labels)
+        self.queue = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        with self.backend._lock:
+            if self in self.backend._streams:
+                self.backend._streams.remove(self)
+        self.queue.put(None)
+
+
+@dataclass
+class FakeWorker:
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    labels: dict = field(default_factory=dict)
+    running: bool = True
+
+
+class FakeBackend(ExecutorBackend):
+    """纯内存后端，exec 按 exec_seconds 模拟耗时，可通过 fail_worker 模拟容器退出"""
+
+    name = "fake"
+
+    def __init__(self, exec_seconds=0.0, start_seconds=0.0, exit_code=0, output=b"", supports_events=True,
+                 supports_sessions=False, session_noise=()):
+        self.exec_seconds = exec_seconds
+        self.start_seconds = start_seconds
+        self.exit_code = exit_code
+        self.output = output
+        self.supports_events = supports_events
+        self.supports_sessions = supports_sessions
+        self.session_noise = list(session_noise)  # 会话在每个响应之前输出的非协议行
+        self._lock = threading.Lock()
+        self._workers = {}
+        self._streams = []
+        self._kills = {}  # job_id -> threading.Event
+        self.executed = []  # (worker id, argv, job_id)
+        self.sessions = []
+        self.requests = []  # 通过会话提交的 (worker id, request)
+
+    def _emit(self, worker, action):
+        with self._lock:
+            streams = [stream for stream in self._streams if stream.labels.items() <= worker.labels.items()]
+        for stream in streams:
+            stream.queue.put({"Action": action, "id": worker.id})
+
+    def start_worker(self, labels):
+        if self.start_seconds:
+            time.sleep(self.start_seconds)
+        worker = FakeWorker(labels=dict(labels))
+        with self._lock:
+            self._workers[worker.id] = worker
+        self._emit(worker, "start")
+        return worker
+
+    def stop_worker(self, worker):
+        with self._lock:
+            self._workers.pop(worker.id, None)
+        if worker.running:
+            worker.running = False
+            self._emit(worker, "die")
+        self._emit(worker, "destroy")
+
+    def fail_worker(self, worker, action="die"):
+        """模拟执行单元意外退出（die/oom 等）"""
+        worker.running = False
+        self._emit(worker, action)
+
+    def events(self, labels):
+        if not self.supports_events:
+            return None
+        stream = _FakeEventStream(self, labels)
+        with self._lock:
+            self._streams.append(stream)
+        return stream
+
+    def is_running(self, worker):
+        return worker.running
+
+    def list_workers(self, labels):
+        with self._lock:
+            return {
+                worker.id: worker.running
+                for worker in self._workers.values()
+                if labels.items() <= worker.labels.items()
+            }
+
+    def engine_command(self):
+        return ["python", "app.py"]
+
+    def input_path(self, name):
+        return f"/fake/input/{name}"
+
+    def output_path(self, name):
+        return f"/fake/output/{name}"
+
+    def engine_digest(self):
+        return "fake"
+
+    def exec(self, worker, argv, job_id, on_line=None, output_limit=DEFAULT_OUTPUT_LIMIT):
+        killed = threading.Event()
+        with self._lock:
+            self._kills[job_id] = killed
+            self.executed.append((worker.id, list(argv), job_id))
+        try:
+            if killed.wait(self.exec_seconds):
+                return -15, b"terminated"
+            output = OutputBuffer(output_limit, on_line)
+            output.feed("stdout", self.output)
+            return self.exit_code, output.getvalue()
+        finally:
+            with self._lock:
+                self._kills.pop(job_id, None)
+
+    def kill(self, worker, job_id):
+        with self._lock:
+            killed = self._kills.get(job_id)
+        if killed is not None:
+            killed.set()
+
+    def open_session(self, worker):
+        if not self.supports_sessions:
+            return None
+        session = FakeEngineSession(self, worker)
+        with self._lock:
+            self.sessions.append(session)
+        return session
+
+
+class FakeEngineSession(EngineSession):
+    """FakeBackend 的会话，请求按 exec_seconds 模拟耗时，close 中断正在执行的请求"""
+
+    def __init__(self, backend, worker):
+        self.backend = backend
+        self.worker = worker
+        self.closed = threading.Event()
+        self._lines = deque()
+
+    def _send(self, data):
+        if self.closed.is_set() or not self.worker.running:
+            raise EngineSessionError("engine session closed")
+        payload = json.loads(data)
+        payload.pop("progress", None)
+        with self.backend._lock:
+            self.backend.requests.append((self.worker.id, payload))
+        if self.closed.wait(self.backend.exec_seconds):
+            raise EngineSessionError("engine session closed")
+        self._lines.extend(self.backend.session_noise)
+        self._lines.append(json.dumps({"id": payload.get("id"), "exit_code": self.backend.exit_code,
+                                       "output": self.backend.output.decode("utf-8")}).encode("utf-8"))
+
+    def _read_line(self):
+        return self._lines.popleft() if self._lines else b""
+
+    def close(self):
+        self.closed.set()
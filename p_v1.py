@@ -283,18 +283,18 @@ class JSONProcessor:
         """批量处理配置文件"""
         output_files = output_files or [f"result_{i}.json" for i in range(len(config_files))]
         
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(self.process_config, cfg, out): (cfg, out)
+        # 并发数不超过容器数，结果按原始顺序返回
+        with ThreadPoolExecutor(max_workers=self.pool_config.max_containers) as executor:
+            futures = [
+                (executor.submit(self.process_config, cfg, out), cfg, out)
                 for cfg, out in zip(config_files, output_files)
-            }
+            ]
             
             results = []
-            for future in as_completed(futures):
+            for future, cfg, out in futures:
                 try:
                     results.append(future.result())
                 except Exception as e:
-                    cfg, out = futures[future]
                     results.append({
                         "error": str(e),
                         "config": cfg,
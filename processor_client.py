@@ -1,13 +1,21 @@
 # processor_client.py
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import docker
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 import threading
-import queue
 import time
 import os
+import uuid
+import json
 import logging
+import mmap
+import shutil
+import weakref
 from dataclasses import dataclass
 
+from app.core.metrics import REGISTRY
+from executor_backends import DockerBackend, EngineSessionError
+from result_cache import ResultCache
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +23,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ContainerPool')
 
+# 池内容器的标签,事件订阅按该标签过滤,只接收本池容器的事件
+POOL_LABEL = "json-processor.pool"
+
+# 由后端事件流维护的容器状态
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_EXITED = "exited"
+STATE_UNHEALTHY = "unhealthy"
+# 这些事件之后容器不再可用
+EXIT_ACTIONS = ("die", "oom", "stop", "kill", "destroy")
+
+# 引擎执行耗时的分桶（秒）
+EXEC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+# 各后端共享的池指标（同一后端在一个进程内通常只有一个池）
+POOL_WORKERS = REGISTRY.gauge(
+    "executor_pool_workers",
+    "Workers in the executor pool by state",
+    ("backend", "state"),
+)
+POOL_ACQUIRE_WAIT = REGISTRY.histogram(
+    "executor_pool_acquire_wait_seconds",
+    "Time spent waiting to acquire a worker from the pool",
+    ("backend",),
+)
+POOL_EXEC = REGISTRY.histogram(
+    "executor_pool_exec_seconds",
+    "Engine execution time by result",
+    ("backend", "result"),
+    EXEC_BUCKETS,
+)
+POOL_WORKER_STARTS = REGISTRY.counter(
+    "executor_pool_worker_starts_total",
+    "Worker start attempts by result",
+    ("backend", "result"),
+)
+POOL_TARGET_WORKERS = REGISTRY.gauge(
+    "executor_pool_target_workers",
+    "Worker count the autoscaler is steering the pool towards",
+    ("backend",),
+)
+POOL_WAITING = REGISTRY.gauge(
+    "executor_pool_waiting_acquires",
+    "Callers waiting to acquire a worker",
+    ("backend",),
+)
+POOL_WORKERS_DISCARDED = REGISTRY.counter(
+    "executor_pool_workers_discarded_total",
+    "Workers removed from the pool because they stopped running",
+    ("backend",),
+)
+
 @dataclass
 class ContainerConfig:
     """容器配置类"""
@@ -22,14 +82,100 @@ class ContainerConfig:
     output_mount: str = "/app/output"
     image: str = "json-processor:latest"
     max_containers: int = 5
+    # 自动伸缩的下限，为空时等于 max_containers，即固定大小的池（不伸缩）
+    min_containers: int = None
     idle_timeout: int = 300  # 空闲容器超时时间（秒）
     max_retries: int = 3     # 容器启动失败重试次数
+    start_timeout: float = 10  # 等待容器就绪（start 事件）的超时时间（秒）
+    reconcile_interval: float = 0  # 向后端校正内存中容器状态的间隔（秒），0 表示只依赖事件流
+    scale_interval: float = 10  # 监控与伸缩决策的周期（秒）
+    scale_up_wait: float = 0.5  # 周期内获取容器等待时间的分位数超过该值（秒）时扩容
+    scale_up_percentile: float = 0.95
+    scale_down_utilization: float = 0.5  # 周期内平均使用率低于该值时缩容
+    scale_down_delay: float = 60  # 低使用率持续、且距上次扩容都超过该时长（秒）才缩容
+    max_host_memory_percent: float = 90  # 主机内存使用率（%）超过该值时不再扩容
+    max_host_load: float = 1.0  # 主机每核 1 分钟平均负载超过该值时不再扩容
+    batch_target_seconds: float = 2.0  # process_batch 每批的目标耗时（秒）
+    max_output_bytes: int = 1024 * 1024  # 每个任务在内存中保留的引擎输出上限（字节），超出时只保留末尾
+    # process_data 的暂存目录（主机上的 tmpfs，如 /dev/shm/json-processor），为空时不启用；
+    # 容器内挂载到 staging_mount
+    staging_dir: str = None
+    staging_mount: str = "/app/staging"
+    server_mode: bool = True  # 在容器内常驻引擎进程（app.py -cmd serve）复用解释器，后端不支持时退回每任务 exec
+    compact_output: bool = False  # 引擎输出紧凑 JSON（无缩进与空白），输出文件约为缩进格式的一半
+
+def host_memory_percent():
+    """主机内存使用率（%），无法读取 /proc/meminfo 时返回 None"""
+    try:
+        with open("/proc/meminfo") as f:
+            meminfo = {line.split(":")[0]: int(line.split()[1]) for line in f}
+        return 100.0 * (1 - meminfo["MemAvailable"] / meminfo["MemTotal"])
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+
+def host_load():
+    """主机每核 1 分钟平均负载，不支持 getloadavg 的平台返回 None"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AutoscalePolicy:
+    """根据获取容器的等待时间与待满足的需求计算目标容器数
+
+    - 扩容：周期内等待时间分位数超过 scale_up_wait、有调用方正在等待容器，或正在使用的容器多于目标
+      （acquire_container 会临时创建超出目标的容器）时，目标至少 +1，并覆盖 正在使用 + 正在等待 的需求；
+      主机内存或负载超过上限时不扩容
+    - 缩容：平均使用率低于 scale_down_utilization 持续 scale_down_delay，且距上次扩容也超过
+      scale_down_delay 时，每次减少约 1/4（至少 1 个），不低于下限与正在使用的数量
+    两个方向的条件互斥并带有延迟，负载在阈值附近波动时目标不会来回跳动。
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.minimum = config.max_containers if config.min_containers is None else config.min_containers
+        self.minimum = max(0, min(self.minimum, config.max_containers))
+        self.enabled = self.minimum < config.max_containers
+        self._low_since = None
+        self._last_scale_up = float("-inf")
+
+    def host_has_capacity(self):
+        memory = host_memory_percent()
+        if memory is not None and memory > self.config.max_host_memory_percent:
+            return False
+        load = host_load()
+        return load is None or load <= self.config.max_host_load
+
+    def decide(self, now, current, busy, waiting, wait_quantile, utilization, host_ok=True):
+        """返回新的目标容器数；current 为当前目标，busy 为正在使用的容器数，utilization 为周期内平均使用率"""
+        config = self.config
+        target = current
+        if waiting or busy > current or (wait_quantile is not None and wait_quantile > config.scale_up_wait):
+            self._low_since = None
+            if host_ok:
+                target = max(current + 1, busy + waiting)
+                self._last_scale_up = now
+        elif utilization < config.scale_down_utilization:
+            if self._low_since is None:
+                self._low_since = now
+            if now - self._low_since >= config.scale_down_delay and now - self._last_scale_up >= config.scale_down_delay:
+                target = current - max(1, current // 4)
+                # 下一次缩容重新计时
+                self._low_since = now
+        else:
+            self._low_since = None
+        return max(self.minimum, busy if target < current else 0, min(target, config.max_containers))
+
 
 class ContainerPool:
-    """企业级容器池管理器（优化关闭版本）"""
+    """企业级容器池管理器（优化关闭版本）
+
+    容器由 backend 启动与执行（见 executor_backends），默认使用 DockerBackend。
+    """
     
-    def __init__(self, config: ContainerConfig, input_dir: str, output_dir: str):
-        self.client = docker.from_env()
+    def __init__(self, config: ContainerConfig, input_dir: str, output_dir: str, backend=None):
         self.config = config
         self.input_dir = os.path.abspath(input_dir)
         self.output_dir = os.path.abspath(output_dir)
@@ -37,47 +183,201 @@ class ContainerPool:
         # 确保目录存在
         os.makedirs(self.input_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
+
+        self.backend = backend or DockerBackend(config, self.input_dir, self.output_dir)
         
         # 容器池数据结构
-        self.available_containers = queue.Queue(maxsize=config.max_containers)
+        # 空闲容器按最后使用时间排序：右端最近使用（获取时优先），左端最久未用（清理时只看左端）
+        self.idle_containers = deque()
         self.active_containers = {}
         self.lock = threading.Lock()
+        # 有容器归还、入池或名额释放时通知等待中的 acquire_container
+        self._pool_changed = threading.Condition(self.lock)
         self.container_timestamps = {}  # 存储容器的最后使用时间
-        
+        self.running_jobs = {}  # job_id -> 正在执行该任务的容器
+        self._cancelled_jobs = set()
+        # container_id -> 常驻引擎会话，None 表示后端不支持或启动失败
+        self._sessions = {}
+        # 正在创建的容器数（已预留名额，尚未入池），创建在锁外并行进行
+        self._starting = 0
+        # container_id -> 状态，由事件流线程更新，状态变化时通知等待就绪的线程
+        self._container_states = {}
+        self._state_changed = threading.Condition(self.lock)
+        self.pool_id = uuid.uuid4().hex[:12]
+        self._labels = {POOL_LABEL: self.pool_id}
+        # 本池在暂存目录下的子目录，关闭时整体删除
+        self.staging_dir = None
+        if config.staging_dir:
+            self.staging_dir = os.path.join(config.staging_dir, self.pool_id)
+            os.makedirs(self.staging_dir, exist_ok=True)
+        self.running = True
+        # 关闭时唤醒监控线程，不必等到下一个检查周期
+        self._stopped = threading.Event()
+
+        # 自动伸缩：监控线程按 _target 补足容器，min_containers < max_containers 时由策略调整 _target
+        self.autoscale = AutoscalePolicy(config)
+        self._target = self.autoscale.minimum
+        self._waiting = 0  # 正在等待容器的调用方数
+        # 使用中容器数对时间的积分，用于计算周期内的平均使用率
+        self._busy_seconds = 0.0
+        self._busy_count = 0
+        self._busy_changed_at = time.monotonic()
+        # 上一次伸缩决策时的状态，决策只看这之后的一个周期
+        self._last_autoscale = time.monotonic()
+        self._last_busy_seconds = 0.0
+        self._wait_snapshot = POOL_ACQUIRE_WAIT.snapshot(self.backend.name)
+
+        # 事件订阅线程，订阅建立后才开始预热，避免漏掉 start 事件
+        self._events = None
+        self._events_ready = threading.Event()
+        self.events_thread = threading.Thread(target=self._watch_events, daemon=True, name="ContainerEvents")
+        self.events_thread.start()
+        self._events_ready.wait(timeout=config.start_timeout)
+
+        # 并行预热容器的线程池
+        self._warmup_executor = ThreadPoolExecutor(
+            max_workers=config.max_containers, thread_name_prefix="ContainerWarmup"
+        )
+
         # 监控线程
         self.monitor_thread = threading.Thread(target=self._monitor_pool, daemon=True)
-        self.running = True
         self.monitor_thread.start()
         
-        logger.info(f"Container pool initialized with max {config.max_containers} containers")
+        logger.info(
+            f"Container pool {self.pool_id} initialized with {self.autoscale.minimum}-{config.max_containers} containers "
+            f"({self.backend.name} backend)"
+        )
+
+    def _watch_events(self):
+        """订阅本池容器的事件，维护容器状态"""
+        reconnecting = False
+        while self.running:
+            try:
+                events = self.backend.events(self._labels)
+                if events is None:
+                    # 后端不支持事件流，就绪检查退回 is_running，健康状态依赖定期校正
+                    return
+                self._events = events
+                self._events_ready.set()
+                if reconnecting:
+                    # 断线期间可能漏掉事件，重新订阅后校正一次
+                    self._reconcile()
+                reconnecting = True
+                for event in self._events:
+                    self._on_event(event)
+            except Exception as e:
+                if self.running:
+                    logger.warning(f"Events stream interrupted: {str(e)}")
+                    time.sleep(1)
+            finally:
+                self._events_ready.set()
+
+    def _on_event(self, event):
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        if not container_id:
+            return
+        with self._state_changed:
+            if action == "start":
+                self._container_states[container_id] = STATE_RUNNING
+            elif container_id not in self._container_states:
+                # 已被池移除的容器不再记录
+                return
+            elif action in EXIT_ACTIONS:
+                self._container_states[container_id] = STATE_EXITED
+            elif action == "health_status: unhealthy":
+                self._container_states[container_id] = STATE_UNHEALTHY
+            elif action == "health_status: healthy":
+                self._container_states[container_id] = STATE_RUNNING
+            else:
+                return
+            self._state_changed.notify_all()
+
+    def _reconcile(self):
+        """用一次 list 调用校正内存中的容器状态（事件流中断时可能漏掉事件）"""
+        try:
+            running = self.backend.list_workers(self._labels)
+        except Exception as e:
+            logger.warning(f"Failed to reconcile container states: {str(e)}")
+            return
+        changed = 0
+        with self._state_changed:
+            for container_id, state in self._container_states.items():
+                if state in (STATE_STARTING, STATE_UNHEALTHY):
+                    continue
+                actual = STATE_RUNNING if running.get(container_id) else STATE_EXITED
+                if actual != state:
+                    self._container_states[container_id] = actual
+                    changed += 1
+            if changed:
+                self._state_changed.notify_all()
+        if changed:
+            logger.warning(f"Reconciled {changed} container states with the {self.backend.name} backend")
+
+    def _is_running(self, container):
+        """读取内存中的健康状态，不访问后端"""
+        with self.lock:
+            return self._container_states.get(container.id) == STATE_RUNNING
+
+    def _discard_container(self, container):
+        """从池中移除不可用的容器，停止与删除在后台进行"""
+        with self.lock:
+            self.active_containers.pop(container.id, None)
+            state = self._container_states.get(container.id)
+            self._pool_changed.notify()
+            self._update_gauges_locked()
+        POOL_WORKERS_DISCARDED.inc(self.backend.name)
+        logger.warning(f"Container {container.id[:12]} not running, state: {state}")
+        try:
+            self._warmup_executor.submit(self._stop_container, container)
+        except RuntimeError:
+            # 池已关闭
+            self._stop_container(container)
+
+    def _wait_ready(self, container):
+        """等待容器的 start 事件；事件流不可用或超时时退回一次状态查询"""
+        deadline = time.monotonic() + self.config.start_timeout
+        with self._state_changed:
+            while self._events is not None:
+                state = self._container_states.get(container.id)
+                if state == STATE_RUNNING:
+                    return
+                if state == STATE_EXITED:
+                    raise RuntimeError(f"Container {container.id[:12]} exited during startup")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._state_changed.wait(remaining)
+
+        if not self.backend.is_running(container):
+            raise RuntimeError(f"Container {container.id[:12]} failed to start")
+        with self.lock:
+            self._container_states[container.id] = STATE_RUNNING
     
     def _create_container(self, retry_count=0):
-        """创建并启动一个新容器"""
+        """创建并启动一个新容器，调用方不能持有 self.lock"""
         try:
-            container = self.client.containers.run(
-                image=self.config.image,
-                volumes={
-                    self.input_dir: {'bind': self.config.input_mount, 'mode': 'ro'},
-                    self.output_dir: {'bind': self.config.output_mount, 'mode': 'rw'}
-                },
-                detach=True
-            )
-            
-            # 等待容器启动完成
-            time.sleep(0.5)
-            
-            # 检查容器状态
-            container.reload()
-            if container.status != 'running':
-                raise RuntimeError(f"Container {container.id[:12]} failed to start: status {container.status}")
+            container = self.backend.start_worker(self._labels)
+            with self.lock:
+                self._container_states.setdefault(container.id, STATE_STARTING)
+
+            # 等待容器就绪
+            try:
+                self._wait_ready(container)
+            except Exception:
+                self._stop_container(container)
+                raise
+            POOL_WORKER_STARTS.inc(self.backend.name, "ok")
             
             # 记录创建时间
-            self.container_timestamps[container.id] = time.time()
+            with self.lock:
+                self.container_timestamps[container.id] = time.time()
             
             logger.info(f"Container created: {container.id[:12]}")
             return container
         
         except Exception as e:
+            POOL_WORKER_STARTS.inc(self.backend.name, "error")
             if retry_count < self.config.max_retries:
                 logger.warning(f"Container creation failed (attempt {retry_count+1}/{self.config.max_retries}): {str(e)}")
                 time.sleep(1)
@@ -85,87 +385,181 @@ class ContainerPool:
             else:
                 logger.error(f"Failed to create container after {self.config.max_retries} attempts: {str(e)}")
                 raise
+
+    def _reserve_slots_locked(self, count):
+        """为即将创建的容器预留名额，返回实际预留的数量，调用方必须持有 self.lock"""
+        current_count = len(self.idle_containers) + len(self.active_containers) + self._starting
+        reserved = max(0, min(count, self.config.max_containers - current_count))
+        self._starting += reserved
+        self._update_gauges_locked()
+        return reserved
+
+    def _reserve_slots(self, count):
+        with self.lock:
+            return self._reserve_slots_locked(count)
+
+    def _update_gauges_locked(self):
+        now = time.monotonic()
+        self._busy_seconds += self._busy_count * (now - self._busy_changed_at)
+        self._busy_count = len(self.active_containers)
+        self._busy_changed_at = now
+        POOL_TARGET_WORKERS.set(self.backend.name, value=self._target)
+        POOL_WAITING.set(self.backend.name, value=self._waiting)
+        POOL_WORKERS.set(self.backend.name, "idle", value=len(self.idle_containers))
+        POOL_WORKERS.set(self.backend.name, "active", value=len(self.active_containers))
+        POOL_WORKERS.set(self.backend.name, "starting", value=self._starting)
+
+    def _add_container(self):
+        """在锁外创建容器并放入空闲队列"""
+        try:
+            container = self._create_container()
+        except Exception as e:
+            logger.error(f"Failed to add container to pool: {str(e)}")
+            with self.lock:
+                self._starting -= 1
+                self._pool_changed.notify()
+                self._update_gauges_locked()
+            return None
+        with self.lock:
+            self._starting -= 1
+            self.container_timestamps[container.id] = time.time()
+            self.idle_containers.append(container)
+            self._pool_changed.notify()
+            self._update_gauges_locked()
+        return container
+
+    def _warm_up(self):
+        """并行创建容器直到达到目标数量"""
+        with self.lock:
+            current_count = len(self.idle_containers) + len(self.active_containers) + self._starting
+            missing = self._reserve_slots_locked(self._target - current_count)
+        if missing:
+            start_time = time.time()
+            futures = [self._warmup_executor.submit(self._add_container) for _ in range(missing)]
+            wait(futures)
+            created = sum(1 for future in futures if future.result() is not None)
+            logger.info(f"Warmed up {created}/{missing} containers in {time.time() - start_time:.2f} seconds")
     
     def _monitor_pool(self):
         """监控容器池状态，维护容器数量"""
+        last_reconcile = time.monotonic()
         while self.running:
             try:
-                # 检查当前池大小
-                with self.lock:
-                    current_count = self.available_containers.qsize() + len(self.active_containers)
-                    
-                    # 添加容器直到达到最大数量
-                    while current_count < self.config.max_containers:
-                        try:
-                            container = self._create_container()
-                            self.available_containers.put(container)
-                            current_count += 1
-                        except Exception as e:
-                            logger.error(f"Failed to add container to pool: {str(e)}")
-                            break
+                # 定期校正容器状态（按监控周期取整）
+                interval = self.config.reconcile_interval
+                if interval and time.monotonic() - last_reconcile >= interval:
+                    self._reconcile()
+                    last_reconcile = time.monotonic()
+
+                # 调整目标容器数并补足
+                if self.autoscale.enabled:
+                    self._autoscale()
+                self._warm_up()
                 
                 # 清理空闲超时的容器
                 self._cleanup_idle_containers()
                 
                 # 定期检查
-                time.sleep(10)
+                self._stopped.wait(self.config.scale_interval)
                 
             except Exception as e:
                 logger.error(f"Error in pool monitor: {str(e)}")
-                time.sleep(5)
+                self._stopped.wait(5)
     
+    def _autoscale(self):
+        """按上一个周期的等待时间、使用率与当前等待数调整目标容器数，缩容时停止最久未用的空闲容器"""
+        now = time.monotonic()
+        wait_quantile = POOL_ACQUIRE_WAIT.quantile(
+            self.config.scale_up_percentile, self.backend.name, since=self._wait_snapshot
+        )
+        self._wait_snapshot = POOL_ACQUIRE_WAIT.snapshot(self.backend.name)
+        host_ok = self.autoscale.host_has_capacity()
+        retired = []
+        with self.lock:
+            self._update_gauges_locked()
+            elapsed = now - self._last_autoscale
+            total = len(self.idle_containers) + len(self.active_containers) + self._starting
+            utilization = (self._busy_seconds - self._last_busy_seconds) / (elapsed * max(1, total)) if elapsed > 0 else 1.0
+            self._last_autoscale, self._last_busy_seconds = now, self._busy_seconds
+            target = self.autoscale.decide(
+                now, self._target, len(self.active_containers), self._waiting, wait_quantile, utilization, host_ok
+            )
+            current = self._target
+            if target != current:
+                logger.info(
+                    f"Autoscaling pool {self.pool_id}: {self._target} -> {target} containers "
+                    f"(waiting={self._waiting}, wait_p{self.config.scale_up_percentile * 100:g}={wait_quantile}, "
+                    f"utilization={utilization:.2f}, host_ok={host_ok})"
+                )
+                self._target = target
+                # 缩容时超出目标的部分从最久未用的空闲容器中移除；临时创建的多余容器由空闲超时回收
+                while target < current and self.idle_containers and total > target:
+                    retired.append(self.idle_containers.popleft())
+                    total -= 1
+            self._update_gauges_locked()
+        for container in retired:
+            self._stop_container(container)
+        if retired:
+            with self.lock:
+                self._pool_changed.notify_all()
+
     def _cleanup_idle_containers(self):
-        """清理空闲超时的容器"""
+        """清理空闲超时的容器：只弹出左端已超时的部分，停止操作在锁外进行
+
+        自动伸缩时空闲超时不会让容器数低于下限。
+        """
+        now = time.time()
+        expired = []
+        busy_too_long = []
         with self.lock:
-            # 创建临时队列以检查空闲时间
-            temp_queue = queue.Queue()
-            removed_count = 0
-            
-            # 处理可用容器
-            while not self.available_containers.empty():
-                container = self.available_containers.get()
-                
-                # 检查是否空闲超时
-                if time.time() - self.container_timestamps.get(container.id, 0) > self.config.idle_timeout:
-                    try:
-                        # 使用带超时的停止方法
-                        if self._stop_container(container):
-                            removed_count += 1
-                    except Exception as e:
-                        logger.warning(f"Failed to remove idle container {container.id[:12]}: {str(e)}")
-                        # 放回队列
-                        temp_queue.put(container)
-                else:
-                    temp_queue.put(container)
-            
-            # 将未超时的容器放回池中
-            while not temp_queue.empty():
-                self.available_containers.put(temp_queue.get())
+            total = len(self.idle_containers) + len(self.active_containers) + self._starting
+            floor = self.autoscale.minimum if self.autoscale.enabled else 0
+            while self.idle_containers and total > floor and \
+                    now - self.container_timestamps.get(self.idle_containers[0].id, 0) > self.config.idle_timeout:
+                expired.append(self.idle_containers.popleft())
+                total -= 1
+            if self.autoscale.enabled:
+                self._target = max(self.autoscale.minimum, min(self._target, total))
             
             # 检查活动容器是否超时
             for container_id, container in list(self.active_containers.items()):
-                if time.time() - self.container_timestamps.get(container_id, 0) > self.config.idle_timeout:
-                    logger.warning(f"Active container {container_id[:12]} has been busy for too long")
-                    # 强制释放
-                    try:
-                        if self._stop_container(container):
-                            del self.active_containers[container_id]
-                            removed_count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to force remove container {container_id[:12]}: {str(e)}")
-            
-            return removed_count
+                if now - self.container_timestamps.get(container_id, 0) > self.config.idle_timeout:
+                    busy_too_long.append(container)
+
+        removed_count = 0
+        for container in expired:
+            # 使用带超时的停止方法
+            if self._stop_container(container):
+                removed_count += 1
+            else:
+                logger.warning(f"Failed to remove idle container {container.id[:12]}")
+
+        for container in busy_too_long:
+            logger.warning(f"Active container {container.id[:12]} has been busy for too long")
+            # 强制释放
+            if self._stop_container(container):
+                with self.lock:
+                    self.active_containers.pop(container.id, None)
+                removed_count += 1
+            else:
+                logger.error(f"Failed to force remove container {container.id[:12]}")
+
+        if removed_count:
+            with self.lock:
+                self._pool_changed.notify_all()
+                self._update_gauges_locked()
+        return removed_count
     
     def _stop_container(self, container):
-        """停止并移除单个容器（带超时）"""
+        """停止并移除单个容器（带超时），调用方不能持有 self.lock"""
         try:
-            # 设置较短的停止超时时间（2秒）
-            container.stop(timeout=2)
-            container.remove()
+            self._close_session(container)
+            self.backend.stop_worker(container)
             
-            # 移除时间戳记录
-            if container.id in self.container_timestamps:
-                del self.container_timestamps[container.id]
+            # 移除时间戳与状态记录（事件线程与获取/归还路径在锁内读写同样的字典）
+            with self.lock:
+                self.container_timestamps.pop(container.id, None)
+                self._container_states.pop(container.id, None)
             
             logger.info(f"Stopped container: {container.id[:12]}")
             return True
@@ -174,115 +568,363 @@ class ContainerPool:
             return False
     
     def acquire_container(self, timeout=30):
-        """从池中获取一个容器"""
-        start_time = time.time()
+        """从池中获取一个容器，优先使用最近归还的（LIFO），让多余的容器自然空闲超时"""
+        start_time = time.monotonic()
+        deadline = start_time + timeout
         
-        while time.time() - start_time < timeout:
-            try:
-                # 尝试从队列中获取
-                container = self.available_containers.get(timeout=1)
-                
-                # 检查容器是否仍然可用
-                container.reload()
-                if container.status == 'running':
-                    with self.lock:
+        while True:
+            unusable = []
+            container = None
+            reserved = False
+            with self.lock:
+                while self.idle_containers:
+                    candidate = self.idle_containers.pop()
+                    # 检查容器是否仍然可用（内存中的健康状态，由事件流维护）
+                    if self._container_states.get(candidate.id) == STATE_RUNNING:
+                        container = candidate
                         self.active_containers[container.id] = container
                         # 更新容器使用时间
                         self.container_timestamps[container.id] = time.time()
-                    logger.debug(f"Acquired container: {container.id[:12]}")
-                    return container
-                
-                # 如果容器不可用，尝试创建新的
-                logger.warning(f"Container {container.id[:12]} not running, status: {container.status}")
-            
-            except queue.Empty:
-                pass  # 继续尝试
+                        self._update_gauges_locked()
+                        break
+                    unusable.append(candidate)
+                if container is None and not unusable:
+                    reserved = bool(self._reserve_slots_locked(1))
+                    if not reserved:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("No containers available in pool")
+                        self._waiting += 1
+                        self._update_gauges_locked()
+                        try:
+                            self._pool_changed.wait(remaining)
+                        finally:
+                            self._waiting -= 1
+
+            # 不可用的容器移出池
+            for candidate in unusable:
+                self._discard_container(candidate)
+            if container is not None:
+                POOL_ACQUIRE_WAIT.observe(time.monotonic() - start_time, self.backend.name)
+                logger.debug(f"Acquired container: {container.id[:12]}")
+                return container
             
-            # 尝试创建新的容器
-            with self.lock:
-                if len(self.active_containers) + self.available_containers.qsize() < self.config.max_containers:
-                    try:
-                        container = self._create_container()
+            # 尝试创建新的容器（预留名额后在锁外创建）
+            if reserved:
+                try:
+                    container = self._create_container()
+                except Exception:
+                    container = None
+                with self.lock:
+                    self._starting -= 1
+                    if container is not None:
                         self.active_containers[container.id] = container
-                        logger.info(f"Created new container for immediate use: {container.id[:12]}")
-                        return container
-                    except Exception:
-                        pass
-        
-        raise TimeoutError("No containers available in pool")
+                        self.container_timestamps[container.id] = time.time()
+                    else:
+                        self._pool_changed.notify()
+                    self._update_gauges_locked()
+                if container is not None:
+                    POOL_ACQUIRE_WAIT.observe(time.monotonic() - start_time, self.backend.name)
+                    logger.info(f"Created new container for immediate use: {container.id[:12]}")
+                    return container
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("No containers available in pool")
     
     def release_container(self, container):
         """释放容器回池中"""
         try:
-            # 检查容器状态
-            container.reload()
-            if container.status != 'running':
-                logger.warning(f"Container {container.id[:12]} not running, status: {container.status}")
-                try:
-                    self._stop_container(container)
-                except Exception:
-                    pass
+            # 检查容器状态（内存中的健康状态，由事件流维护）
+            if not self._is_running(container):
+                self._discard_container(container)
                 return
             
-            # 从活动容器中移除
+            # 从活动容器移到空闲队列右端并更新时间戳
             with self.lock:
-                if container.id in self.active_containers:
-                    del self.active_containers[container.id]
-            
-            # 放回可用队列并更新时间戳
-            self.container_timestamps[container.id] = time.time()
-            self.available_containers.put(container)
+                self.active_containers.pop(container.id, None)
+                self.container_timestamps[container.id] = time.time()
+                self.idle_containers.append(container)
+                self._pool_changed.notify()
+                self._update_gauges_locked()
             logger.debug(f"Released container: {container.id[:12]}")
         
         except Exception as e:
             logger.error(f"Error releasing container {container.id[:12]}: {str(e)}")
     
-    def process_config(self, config_file, output_file="out.json"):
-        """处理配置文件（使用容器池）"""
+    def process_config(self, config_file, output_file="out.json", job_id=None, on_progress=None):
+        """处理配置文件（使用容器池），on_progress(dict) 实时收到引擎报告的进度"""
+        job_id = job_id or uuid.uuid4().hex
+        items = self._items([(config_file, output_file)])
+        self._remove_outputs([output_file])
+        results, elapsed = self._run_in_container(
+            job_id, lambda container: self._run_job(container, items, job_id, on_progress)
+        )
+        return self._result(results[0], config_file, output_file, job_id, elapsed)
+
+    def process_configs(self, pairs, job_id=None, on_progress=None):
+        """在同一个容器内一次处理多个 (配置文件, 输出文件)，按顺序返回与 process_config 相同结构的结果
+
+        引擎以 batch 命令处理整批配置，进程启动与 exec 的开销由整批分摊；
+        每完成一项 on_progress 收到 {"done", "total", "config"}。
+        """
+        job_id = job_id or uuid.uuid4().hex
+        pairs = list(pairs)
+        items = self._items(pairs)
+        self._remove_outputs([output_file for _, output_file in pairs])
+        results, elapsed = self._run_in_container(
+            job_id, lambda container: self._run_job(container, items, job_id, on_progress)
+        )
+        return [
+            self._result(result, config_file, output_file, job_id, elapsed)
+            for result, (config_file, output_file) in zip(results, pairs)
+        ]
+
+    def process_data(self, config, job_id=None, on_progress=None):
+        """处理内存中的配置（dict / str / bytes），输入输出经 tmpfs 暂存目录传递，不落盘
+
+        返回 StagedResult，其 output 为输出文件的只读内存映射；用完后 close()（或用 with），
+        暂存文件随之删除。需要设置 ContainerConfig.staging_dir。
+        """
+        if self.staging_dir is None:
+            raise RuntimeError("process_data requires ContainerConfig.staging_dir")
+        job_id = job_id or uuid.uuid4().hex
+        input_path = os.path.join(self.staging_dir, f"{job_id}.in.json")
+        output_path = os.path.join(self.staging_dir, f"{job_id}.out.json")
+        if isinstance(config, dict):
+            config = json.dumps(config)
+        if isinstance(config, str):
+            config = config.encode("utf-8")
+        with open(input_path, "wb") as f:
+            f.write(config)
+        try:
+            items = [{"config": self.backend.staging_path(input_path), "output": self.backend.staging_path(output_path)}]
+            results, elapsed = self._run_in_container(
+                job_id, lambda container: self._run_job(container, items, job_id, on_progress)
+            )
+        except BaseException:
+            _remove_files(input_path, output_path)
+            raise
+        # 输入在任务结束后即可删除，输出保留到结果被关闭
+        _remove_files(input_path)
+        exit_code, message = results[0]
+        return StagedResult(exit_code, message, job_id, elapsed, output_path)
+
+    def _items(self, pairs):
+        """(配置文件, 输出文件) 名称转换为执行单元内的路径"""
+        return [
+            {"config": self.backend.input_path(config_file), "output": self.backend.output_path(output_file)}
+            for config_file, output_file in pairs
+        ]
+
+    def _remove_outputs(self, output_files):
+        """执行前删除已有的输出文件：它可能是结果缓存的硬链接，引擎原地改写会破坏缓存"""
+        _remove_files(*(os.path.join(self.output_dir, output_file) for output_file in output_files))
+
+    @staticmethod
+    def _result(result, config_file, output_file, job_id, elapsed):
+        exit_code, output = result
+        return {
+            "exit_code": exit_code,
+            "output": output,
+            "config": config_file,
+            "output_file": output_file,
+            "job_id": job_id,
+            "elapsed": elapsed,
+        }
+
+    def _run_in_container(self, job_id, run):
+        """获取容器执行 run(container)，返回 (每项的 (退出码, 输出) 列表, 执行耗时)"""
         container = self.acquire_container()
         
         try:
-            # 构建容器内路径
-            container_config = f"{self.config.input_mount}/{config_file}"
-            container_output = f"{self.config.output_mount}/{output_file}"
-            
-            # 执行处理命令
-            cmd = f"python app.py -cmd pd -c {container_config} -o {container_output}"
-            exit_code, output = container.exec_run(cmd)
+            with self.lock:
+                self.running_jobs[job_id] = container
+            start_time = time.monotonic()
+            try:
+                results = run(container)
+            except BaseException:
+                # 任务被取消（SoftTimeLimitExceeded / KeyboardInterrupt 等）时，exec 被中断，
+                # 但容器内的进程仍在运行，必须先杀掉它再归还容器
+                POOL_EXEC.observe(time.monotonic() - start_time, self.backend.name, "cancelled")
+                self._kill_job(container, job_id)
+                raise
+            finally:
+                with self.lock:
+                    self.running_jobs.pop(job_id, None)
+                    self._cancelled_jobs.discard(job_id)
+            elapsed = time.monotonic() - start_time
+            ok = all(exit_code == 0 for exit_code, _ in results)
+            POOL_EXEC.observe(elapsed, self.backend.name, "ok" if ok else "error")
             
             # 更新容器使用时间
             with self.lock:
                 if container.id in self.container_timestamps:
                     self.container_timestamps[container.id] = time.time()
             
-            return {
-                "exit_code": exit_code,
-                "output": output.decode('utf-8'),
-                "config": config_file,
-                "output_file": output_file
-            }
+            return results, elapsed
         
         finally:
             self.release_container(container)
+
+    def _run_job(self, container, items, job_id, on_progress=None):
+        """在容器内执行一个任务（items 为执行单元内的 {"config", "output"} 路径），返回每项的 (退出码, 输出)
+
+        优先通过常驻引擎会话提交；单个配置使用 pd 命令，多个配置使用 batch 命令。
+        """
+        on_progress = self._guard_progress(on_progress, job_id)
+        response = self._session_request(container, job_id, items, on_progress) if self.config.server_mode else None
+        if response is None:
+            response = self._exec_request(container, job_id, items, on_progress)
+        results = [(result["exit_code"], result["message"]) for result in response.get("results", [])]
+        if len(items) == 1 and not results:
+            results = [(response["exit_code"], response["output"])]
+        # 批处理中途失败或被终止时，未完成的项沿用整批的退出码与输出
+        results.extend((response["exit_code"] or -1, response["output"]) for _ in items[len(results):])
+        return results
+
+    @staticmethod
+    def _guard_progress(on_progress, job_id):
+        """进度回调出错（如结果后端不可用）只记录日志，不影响任务执行"""
+        if on_progress is None:
+            return None
+
+        def guarded(progress):
+            try:
+                on_progress(progress)
+            except Exception as e:
+                logger.warning(f"Progress callback failed for job {job_id}: {str(e)}")
+        return guarded
+
+    def _session_request(self, container, job_id, items, on_progress=None):
+        """通过常驻引擎会话提交请求；会话不可用或意外断开时返回 None，由调用方退回 exec"""
+        session = self._get_session(container)
+        if session is None:
+            return None
+        if len(items) == 1:
+            request = {"id": job_id, "cmd": "pd", **items[0]}
+        else:
+            request = {"id": job_id, "cmd": "batch", "items": items}
+        if self.config.compact_output:
+            request["compact"] = True
+        try:
+            return session.request(request, on_progress)
+        except EngineSessionError as e:
+            self._close_session(container)
+            with self.lock:
+                cancelled = job_id in self._cancelled_jobs
+            if cancelled:
+                return {"exit_code": -15, "output": "terminated"}
+            # 常驻进程意外退出：丢弃会话，本次退回 exec，下次任务重新建立会话
+            logger.warning(f"Engine session in container {container.id[:12]} broken, falling back to exec: {str(e)}")
+            return None
+
+    def _exec_request(self, container, job_id, items, on_progress=None):
+        """每个任务 exec 一个引擎进程；多个配置时写出清单并以 batch 命令执行
+
+        输出按行流式处理：`RESULT {json}` 行收集为每项结果，`PROGRESS {json}` 行转发给 on_progress，
+        其余行作为任务输出保留（不超过 max_output_bytes）。
+        """
+        results = []
+
+        def on_line(stream, line):
+            kind, _, payload = line.partition(" ")
+            if kind not in ("RESULT", "PROGRESS"):
+                return False
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                return False
+            if kind == "RESULT":
+                results.append(message)
+            elif on_progress is not None:
+                on_progress(message)
+            return True
+
+        options = ["--compact"] if self.config.compact_output else []
+        if len(items) == 1:
+            argv = self.backend.engine_command() + ["-cmd", "pd", "-c", items[0]["config"], "-o", items[0]["output"]] + options
+            exit_code, output = self.backend.exec(container, argv, job_id, on_line, self.config.max_output_bytes)
+            return {"exit_code": exit_code, "output": output.decode("utf-8", "replace")}
+
+        manifest = f".batch-{job_id}.json"
+        manifest_path = os.path.join(self.input_dir, manifest)
+        with open(manifest_path, "w") as f:
+            json.dump(items, f)
+        try:
+            argv = self.backend.engine_command() + ["-cmd", "batch", "-m", self.backend.input_path(manifest)] + options
+            if on_progress is not None:
+                argv.append("--progress")
+            exit_code, output = self.backend.exec(container, argv, job_id, on_line, self.config.max_output_bytes)
+        finally:
+            os.remove(manifest_path)
+        return {"exit_code": exit_code, "output": output.decode("utf-8", "replace"), "results": results}
+
+    def _get_session(self, container):
+        """获取容器的常驻引擎会话，首次使用时建立；容器同一时间只被一个任务持有，无需在锁内建立"""
+        with self.lock:
+            if container.id in self._sessions:
+                return self._sessions[container.id]
+        try:
+            session = self.backend.open_session(container)
+        except Exception as e:
+            logger.warning(f"Failed to open engine session in container {container.id[:12]}: {str(e)}")
+            session = None
+        with self.lock:
+            self._sessions[container.id] = session
+        return session
+
+    def _close_session(self, container):
+        """关闭并丢弃容器的常驻引擎会话，下次使用时重新建立"""
+        with self.lock:
+            session = self._sessions.pop(container.id, None)
+        if session is not None:
+            try:
+                session.close()
+            except Exception as e:
+                logger.warning(f"Error closing engine session in container {container.id[:12]}: {str(e)}")
+
+    def cancel_job(self, job_id):
+        """终止正在执行的任务，容器由执行线程在 exec 返回后归还"""
+        with self.lock:
+            container = self.running_jobs.get(job_id)
+            if container is not None:
+                self._cancelled_jobs.add(job_id)
+        if container is None:
+            return False
+        self._kill_job(container, job_id)
+        return True
+
+    def _kill_job(self, container, job_id):
+        """杀掉容器内的任务进程；通过会话执行时关闭会话即终止常驻进程"""
+        try:
+            self._close_session(container)
+            self.backend.kill(container, job_id)
+            logger.info(f"Killed job {job_id} in container {container.id[:12]}")
+        except Exception as e:
+            logger.warning(f"Failed to kill job {job_id} in container {container.id[:12]}: {str(e)}")
     
     def shutdown(self):
         """关闭容器池，并行清理所有容器"""
         self.running = False
+        self._stopped.set()
+        if self._events is not None:
+            self._events.close()
+        self._warmup_executor.shutdown(wait=False, cancel_futures=True)
         if self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=5)
+        self.events_thread.join(timeout=5)
         
         # 收集所有需要停止的容器
         containers_to_stop = []
         with self.lock:
-            # 获取所有可用容器
-            while not self.available_containers.empty():
-                container = self.available_containers.get()
-                containers_to_stop.append(container)
+            # 获取所有空闲容器
+            containers_to_stop.extend(self.idle_containers)
+            self.idle_containers.clear()
             
             # 获取所有活动容器
             for container_id, container in list(self.active_containers.items()):
                 containers_to_stop.append(container)
                 del self.active_containers[container_id]
+            self._update_gauges_locked()
         
         # 使用线程池并行停止容器
         start_time = time.time()
@@ -307,71 +949,332 @@ class ContainerPool:
                         logger.error(f"Error stopping container {container.id[:12]}: {str(e)}")
         
         # 清理时间戳记录
-        for container in containers_to_stop:
-            if container.id in self.container_timestamps:
-                del self.container_timestamps[container.id]
+        with self.lock:
+            for container in containers_to_stop:
+                self.container_timestamps.pop(container.id, None)
         
         elapsed = time.time() - start_time
         logger.info(f"Stopped {stopped_count}/{len(containers_to_stop)} containers in {elapsed:.2f} seconds")
+        if self.staging_dir is not None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
         logger.info("Container pool shutdown complete")
 
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _release_staged(mapped, file, path):
+    if mapped is not None:
+        try:
+            mapped.close()
+        except BufferError:
+            # 调用方仍持有映射的切片视图，映射随视图释放；文件可以先删除
+            pass
+    if file is not None:
+        file.close()
+    _remove_files(path)
+
+
+class StagedResult:
+    """process_data 的结果
+
+    output 为输出文件的只读内存映射（支持缓冲区协议，可直接切片、写入 socket 或交给解析器），
+    读取时不整体复制到进程内存；任务失败或输出为空时为 b""。close() 或离开 with 时释放映射并
+    删除暂存文件，未显式关闭的结果在被回收时清理。
+    """
+
+    def __init__(self, exit_code, message, job_id, elapsed, output_path):
+        self.exit_code = exit_code
+        self.message = message
+        self.job_id = job_id
+        self.elapsed = elapsed
+        self.output = b""
+        file = mapped = None
+        if exit_code == 0:
+            try:
+                file = open(output_path, "rb")
+                if os.fstat(file.fileno()).st_size:
+                    mapped = self.output = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                pass
+        self._finalizer = weakref.finalize(self, _release_staged, mapped, file, output_path)
+
+    def json(self):
+        """解析输出 JSON"""
+        return json.loads(self.output[:])
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class BatchPlanner:
+    """按预计耗时把配置文件打包成批
+
+    预计耗时 = (每项固定开销 + 文件大小 × 单位耗时) × 校正系数，校正系数由已完成批次的
+    实测耗时与预计耗时之比滑动更新，使打包逐渐贴近目标耗时。
+    """
+
+    def __init__(self, item_seconds=0.005, seconds_per_byte=2e-8, alpha=0.3):
+        self.item_seconds = item_seconds
+        self.seconds_per_byte = seconds_per_byte
+        self.alpha = alpha
+        self.scale = 1.0
+        self._lock = threading.Lock()
+
+    def estimate(self, size):
+        return (self.item_seconds + size * self.seconds_per_byte) * self.scale
+
+    def pack(self, sizes, target_seconds, min_batches=1):
+        """把各项（按原顺序）切分为连续的批，返回每批的下标列表
+
+        整体预计耗时较小时缩小每批目标，保证至少有 min_batches 批可以并行执行。
+        """
+        estimates = [self.estimate(size) for size in sizes]
+        if min_batches > 1:
+            target_seconds = min(target_seconds, sum(estimates) / min_batches)
+        batches, batch, batch_seconds = [], [], 0.0
+        for index, seconds in enumerate(estimates):
+            if batch and batch_seconds + seconds > target_seconds:
+                batches.append(batch)
+                batch, batch_seconds = [], 0.0
+            batch.append(index)
+            batch_seconds += seconds
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def observe(self, sizes, elapsed):
+        """记录一批的实测耗时"""
+        with self._lock:
+            predicted = sum(self.estimate(size) for size in sizes)
+            if predicted > 0 and elapsed > 0:
+                self.scale *= (1 - self.alpha) + self.alpha * elapsed / predicted
+
+
 class JSONProcessor:
     """高级JSON处理器（使用容器池）"""
     
-    def __init__(self, input_dir, output_dir, pool_config=None):
+    def __init__(self, input_dir, output_dir, pool_config=None, backend=None, result_cache=None):
         self.input_dir = input_dir
         self.output_dir = output_dir
         
         # 使用默认配置或自定义配置
         self.pool_config = pool_config or ContainerConfig()
         
-        # 创建容器池
+        # 创建容器池，backend 为空时使用 Docker
         self.container_pool = ContainerPool(
             config=self.pool_config,
             input_dir=input_dir,
-            output_dir=output_dir
+            output_dir=output_dir,
+            backend=backend
         )
+        self.batch_planner = BatchPlanner()
+
+        # 结果缓存（ResultCache），键包含引擎摘要，引擎更新后旧结果自然失效
+        self.result_cache = result_cache
+        self._engine_digest = None
+        if result_cache is not None:
+            self._engine_digest = self.container_pool.backend.engine_digest()
+            if self._engine_digest is None:
+                logger.warning(f"{self.container_pool.backend.name} backend has no engine digest, result cache disabled")
+                self.result_cache = None
     
-    def process_config(self, config_file, output_file="out.json"):
-        """处理单个配置文件"""
-        return self.container_pool.process_config(config_file, output_file)
+    def process_config(self, config_file, output_file="out.json", job_id=None, on_progress=None):
+        """处理单个配置文件，结果缓存命中时直接放置输出文件，不获取容器"""
+        key = self._cache_key(config_file)
+        cached = self._cached_result(key, config_file, output_file)
+        if cached is not None:
+            return cached
+        result = self.container_pool.process_config(config_file, output_file, job_id=job_id, on_progress=on_progress)
+        self._store_result(key, result)
+        return result
+
+    def _cache_key(self, config_file):
+        """配置文件的缓存键；未启用缓存或文件不可读时返回 None"""
+        if self.result_cache is None:
+            return None
+        try:
+            with open(os.path.join(self.container_pool.input_dir, config_file), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        return ResultCache.key(content, self._engine_digest, f"compact={self.pool_config.compact_output}")
+
+    def _cached_result(self, key, config_file, output_file):
+        if key is None or not self.result_cache.fetch(key, os.path.join(self.container_pool.output_dir, output_file)):
+            return None
+        return {
+            "exit_code": 0,
+            "output": f"Cached: {config_file} -> {output_file}",
+            "config": config_file,
+            "output_file": output_file,
+            "job_id": None,
+            "elapsed": 0.0,
+            "cached": True,
+        }
+
+    def _store_result(self, key, result):
+        if key is not None and result.get("exit_code") == 0:
+            self.result_cache.store(key, os.path.join(self.container_pool.output_dir, result["output_file"]))
+
+    def process_data(self, config, job_id=None, on_progress=None):
+        """处理内存中的配置，输入输出经 tmpfs 暂存（见 ContainerPool.process_data）"""
+        return self.container_pool.process_data(config, job_id=job_id, on_progress=on_progress)
+
+    def cancel_job(self, job_id):
+        """取消正在执行的任务"""
+        return self.container_pool.cancel_job(job_id)
     
-    def process_batch(self, config_files, output_files=None):
-        """批量处理多个配置文件"""
+    def process_batch(self, config_files, output_files=None, target_seconds=None, on_progress=None, job_timeout=None):
+        """批量处理多个配置文件，全部完成后按原始顺序返回结果（见 iter_batch）"""
+        return list(self.iter_batch(
+            config_files, output_files, ordered=True,
+            target_seconds=target_seconds, on_progress=on_progress, job_timeout=job_timeout,
+        ))
+
+    def iter_batch(self, config_files, output_files=None, ordered=False, target_seconds=None, on_progress=None,
+                   job_timeout=None):
+        """批量处理多个配置文件，以生成器逐个产出每个文件的结果
+
+        按预计耗时把文件打包成批（每批约 target_seconds，默认 pool_config.batch_target_seconds），
+        每批在一个容器内由引擎一次处理。同时执行的批数不超过 max_containers，只有调用方取走结果后
+        才提交新的批：消费慢时自动降速，任意规模的批量只占用固定数量的线程。
+
+        ordered 为 False 时按完成顺序产出，为 True 时按原始顺序产出（已完成但未轮到的结果暂存，
+        也计入在途批数）。job_timeout 为每个文件的执行时限（秒），一批的时限为 job_timeout × 文件数，
+        超时的批被终止，其中各文件的结果带 "timed_out": True。
+        每完成一个文件 on_progress 收到整体进度 {"done", "total", "config"}。
+        """
         if output_files is None:
             output_files = [f"result_{i}.json" for i in range(len(config_files))]
+        pairs = list(zip(config_files, output_files))
+        progress_lock = threading.Lock()
+        done = 0
         
-        results = []
-        threads = []
-        lock = threading.Lock()
+        def batch_progress(progress):
+            nonlocal done
+            with progress_lock:
+                done += 1
+                on_progress({"done": done, "total": len(pairs), "config": progress.get("config")})
         
-        # 使用线程池并发处理
-        def process_task(idx, config_file, output_file):
-            try:
-                result = self.process_config(config_file, output_file)
-                with lock:
-                    results.append((idx, result))
-            except Exception as e:
-                with lock:
-                    results.append((idx, {"error": str(e)}))
+        # 缓存命中的文件直接放置输出，其余的打包执行
+        keys = [self._cache_key(config_file) for config_file, _ in pairs]
+        completed = {}  # 下标 -> 已完成、尚未产出的结果
+        pending = []
+        for i, (config_file, output_file) in enumerate(pairs):
+            cached = self._cached_result(keys[i], config_file, output_file)
+            if cached is None:
+                pending.append(i)
+                continue
+            completed[i] = cached
+            if on_progress:
+                batch_progress({"config": config_file})
         
-        # 创建并启动线程
-        for i, (config_file, output_file) in enumerate(zip(config_files, output_files)):
-            thread = threading.Thread(
-                target=process_task,
-                args=(i, config_file, output_file),
-                daemon=True
+        sizes = {i: self._config_size(pairs[i][0]) for i in pending}
+        batches = deque(
+            [pending[j] for j in batch]
+            for batch in self.batch_planner.pack(
+                [sizes[i] for i in pending],
+                target_seconds or self.pool_config.batch_target_seconds,
+                min_batches=self.pool_config.max_containers,
             )
-            thread.start()
-            threads.append(thread)
+        )
         
-        # 等待所有线程完成
-        for thread in threads:
-            thread.join(timeout=120)
+        def process_task(indexes, job_id):
+            batch_results = self.container_pool.process_configs(
+                [pairs[i] for i in indexes], job_id=job_id, on_progress=batch_progress if on_progress else None
+            )
+            self.batch_planner.observe([sizes[i] for i in indexes], batch_results[0]["elapsed"])
+            for i, result in zip(indexes, batch_results):
+                self._store_result(keys[i], result)
+            return batch_results
         
-        # 按原始顺序排序结果
-        results.sort(key=lambda x: x[0])
-        return [result for _, result in results]
+        max_running = self.pool_config.max_containers
+        # ordered 时已完成但未轮到的批也占用名额，留出一倍余量，避免一个慢批让其余容器空闲
+        max_open = max_running * 2 if ordered else max_running
+        running = {}  # future -> (下标列表, job_id, 截止时间)
+        remaining = {}  # job_id -> 尚未产出的结果数，即在途的批
+        job_of = {}  # 下标 -> job_id
+        timed_out = set()  # 已超时的 job_id
+        next_index = 0  # ordered 时下一个要产出的下标
+        
+        def take(i):
+            job_id = job_of.pop(i, None)
+            if job_id is not None:
+                remaining[job_id] -= 1
+                if not remaining[job_id]:
+                    del remaining[job_id]
+            return completed.pop(i)
+        
+        with ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="BatchJob") as executor:
+            try:
+                while True:
+                    # 产出已完成的结果
+                    if ordered:
+                        while next_index in completed:
+                            yield take(next_index)
+                            next_index += 1
+                    else:
+                        for i in list(completed):
+                            yield take(i)
+                    
+                    # 调用方取走结果后才提交新的批
+                    while batches and len(running) < max_running and len(remaining) < max_open:
+                        indexes = batches.popleft()
+                        job_id = uuid.uuid4().hex
+                        deadline = time.monotonic() + job_timeout * len(indexes) if job_timeout else None
+                        running[executor.submit(process_task, indexes, job_id)] = (indexes, job_id, deadline)
+                        remaining[job_id] = len(indexes)
+                        job_of.update((i, job_id) for i in indexes)
+                    if not running:
+                        break
+                    
+                    # 等到有批完成或最近的截止时间；尚未拿到容器而无法终止的批稍后重试
+                    deadlines = [deadline for _, job_id, deadline in running.values() if deadline and job_id not in timed_out]
+                    timeout = max(0.05, min(deadlines) - time.monotonic()) if deadlines else None
+                    finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        indexes, job_id, _ = running.pop(future)
+                        try:
+                            batch_results = future.result()
+                        except Exception as e:
+                            batch_results = [
+                                {"error": str(e), "config": pairs[i][0], "output_file": pairs[i][1]} for i in indexes
+                            ]
+                        for i, result in zip(indexes, batch_results):
+                            if job_id in timed_out:
+                                result["timed_out"] = True
+                            completed[i] = result
+                        timed_out.discard(job_id)
+                    
+                    # 终止超时的批，执行线程随之返回
+                    now = time.monotonic()
+                    for indexes, job_id, deadline in running.values():
+                        if deadline and deadline <= now and job_id not in timed_out:
+                            if self.container_pool.cancel_job(job_id):
+                                logger.warning(f"Batch job {job_id} ({len(indexes)} configs) exceeded its deadline")
+                                timed_out.add(job_id)
+            finally:
+                # 调用方提前结束迭代（或出错）时，不再提交新的批，并终止在途的批
+                batches.clear()
+                for _, job_id, _ in running.values():
+                    self.container_pool.cancel_job(job_id)
+
+    def _config_size(self, config_file):
+        try:
+            return os.path.getsize(os.path.join(self.container_pool.input_dir, config_file))
+        except OSError:
+            return 0
     
     def shutdown(self):
         """关闭处理器并清理资源"""
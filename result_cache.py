@@ -0,0 +1,161 @@
+"""按内容寻址的引擎结果缓存
+
+键为 sha256(引擎摘要, 处理选项, 配置文件内容)，值为引擎的输出文件，保存在
+<directory>/<键的前两位>/<键>.json。命中时把缓存文件硬链接（跨文件系统时复制）到输出路径，
+不需要获取容器。缓存文件为只读：与之硬链接的输出文件不能被原地改写，重新处理前要先删除输出文件
+（ContainerPool 在执行前会删除）。
+
+总大小超过 max_bytes 时按最近使用时间（LRU）淘汰；最近使用时间记录在文件的 mtime 上，
+进程重启后按 mtime 恢复顺序。
+"""
+
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger('ResultCache')
+
+RESULT_CACHE_LOOKUPS = REGISTRY.counter(
+    "result_cache_lookups_total",
+    "Result cache lookups by result",
+    ("result",),
+)
+RESULT_CACHE_EVICTIONS = REGISTRY.counter(
+    "result_cache_evictions_total",
+    "Result cache entries evicted to stay within the size bound",
+)
+RESULT_CACHE_BYTES = REGISTRY.gauge(
+    "result_cache_bytes",
+    "Total size of cached results",
+)
+
+
+def place_file(source, destination):
+    """把 source 放到 destination（先删除已有文件）：优先硬链接，不在同一文件系统时复制"""
+    try:
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ResultCache:
+    """大小受限的 LRU 结果缓存，线程安全"""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> 大小，左端最久未用
+        self._bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """扫描已有的缓存文件，按 mtime 恢复 LRU 顺序"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if not name.endswith(".json"):
+                    # 写入过程中中断留下的临时文件
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict_locked()
+
+    @staticmethod
+    def key(content: bytes, engine_digest: str, *options) -> str:
+        """由配置内容、引擎摘要与影响输出的处理选项计算缓存键"""
+        digest = hashlib.sha256()
+        for part in (engine_digest, *options):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def fetch(self, key, destination) -> bool:
+        """命中时把缓存的结果放到 destination 并返回 True"""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+        if hit:
+            path = self._path(key)
+            try:
+                place_file(path, destination)
+                os.utime(path)
+            except FileNotFoundError:
+                # 缓存文件被外部删除
+                with self._lock:
+                    self._bytes -= self._entries.pop(key, 0)
+                hit = False
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        RESULT_CACHE_LOOKUPS.inc("hit" if hit else "miss")
+        return hit
+
+    def store(self, key, source):
+        """把处理成功的输出文件存入缓存"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        try:
+            place_file(source, partial)
+            os.chmod(partial, 0o444)
+            size = os.path.getsize(partial)
+            os.replace(partial, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache result {source}: {str(e)}")
+            if os.path.exists(partial):
+                os.remove(partial)
+            return
+        with self._lock:
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            RESULT_CACHE_EVICTIONS.inc()
+        RESULT_CACHE_BYTES.set(value=self._bytes)
+
+    def stats(self):
+        """命中统计与当前大小"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
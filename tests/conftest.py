@@ -1,10 +1,58 @@
-# import pytest
-# from starlette.testclient import TestClient
+import pytest
 
-# from main import app
+from app.core import config as app_config
 
+# config.yml 中没有默认值的环境变量,测试使用不依赖外部服务的取值
+REQUIRED_ENV = {
+    "API_HOST": "0.0.0.0",
+    "API_PORT": "8000",
+    "API_HOST_PORT": "8004",
+    "DB_URL": "sqlite://",
+    "DB_ECHO": "false",
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+}
 
-# @pytest.fixture(scope="module")
-# def test_app():
-#     client = TestClient(app)
-#     yield client  # testing happens here
+
+@pytest.fixture
+def env(monkeypatch):
+    """测试专用的环境变量,配置在测试结束后重新加载"""
+    for name, value in REQUIRED_ENV.items():
+        monkeypatch.setenv(name, value)
+    for name in ("CELERY_METRICS_PORT", "ENGINE_BACKEND", "DB_LOADER_STRATEGY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("APP_PROFILE", "default")
+    monkeypatch.setattr(app_config, "_config", None)
+    return monkeypatch
+
+
+@pytest.fixture
+def client(env, tmp_path):
+    """基于临时 SQLite 数据库的 API 客户端,不启动 worker"""
+    from fastapi.testclient import TestClient
+
+    from app.api.main import create_app
+    from app.core.dependencies import Container
+
+    env.setenv("DB_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    env.setenv("CELERY_METRICS_PORT", "0")
+    Container.db.reset()
+    try:
+        with TestClient(create_app()) as client:
+            yield client
+    finally:
+        Container.db.reset()
+
+
+@pytest.fixture
+def session(tmp_path):
+    """建好全部表的临时 SQLite 数据库会话"""
+    from sqlmodel import SQLModel
+
+    from app.core.database import Database
+    from app.core.settings import DatabaseSettings
+
+    db = Database(DatabaseSettings(url=f"sqlite:///{tmp_path / 'session.db'}", echo=False))
+    db.create_tables(SQLModel)
+    with db.session() as session:
+        yield session
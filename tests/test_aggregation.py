@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def tasks(env):
+    from app.worker import tasks
+
+    return tasks
+
+
+def run(signature):
+    # 在当前进程内执行 chord,不经过 broker
+    return signature.apply().get()
+
+
+@pytest.mark.parametrize("reduction, expected", [
+    ("sum", 4950.0),
+    ("mean", 49.5),
+    ("min", 0.0),
+    ("max", 99.0),
+])
+def test_chunked_reductions_match_numpy(tasks, reduction, expected):
+    signature = tasks.aggregate_signature(list(range(100)), reduction, chunk_size=7)
+    # 100 个元素按 7 个一块切分
+    assert len(signature.tasks) == 15
+    assert run(signature) == pytest.approx(expected)
+
+
+def test_histogram_uses_shared_bin_edges(tasks):
+    values = np.random.default_rng(0).normal(size=1000)
+    result = run(tasks.aggregate_signature(values, "histogram", chunk_size=128, bins=8))
+    counts, edges = np.histogram(values, bins=8)
+    assert result == {"count": 1000, "counts": counts.tolist(), "edges": pytest.approx(edges.tolist())}
+
+
+@pytest.mark.parametrize("reduction, expected", [
+    ("sum", 0.0),
+    ("mean", None),
+    ("min", None),
+    ("max", None),
+])
+def test_empty_input_skips_chord(tasks, reduction, expected):
+    signature = tasks.aggregate_signature([], reduction)
+    assert signature.task == tasks.combine_partials.name
+    assert run(signature) == expected
+
+
+def test_empty_histogram_has_zero_counts(tasks):
+    result = run(tasks.aggregate_signature([], "histogram", bins=4))
+    assert result == {"count": 0, "counts": [0, 0, 0, 0], "edges": [0.0, 0.25, 0.5, 0.75, 1.0]}
+
+
+def test_rejects_unknown_reduction(tasks):
+    with pytest.raises(ValueError):
+        tasks.aggregate_signature([1, 2], "median")
@@ -0,0 +1,82 @@
+import uuid
+
+
+def create_model_config(client, name="llama"):
+    response = client.post("/model_config/create", json={"name": name, "type": "llm", "params": {"layers": 2}})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_get_by_id_returns_entity(client):
+    created = create_model_config(client)
+    response = client.get(f"/model_config/{created['id']}")
+    assert response.status_code == 200
+    assert response.json()["name"] == "llama"
+
+
+def test_get_unknown_id_returns_404(client):
+    response = client.get(f"/model_config/{uuid.uuid4()}")
+    assert response.status_code == 404
+    assert "not found" in response.json()["detail"]
+
+
+def update_model_config(entity_id, params):
+    from app.core.dependencies import Container
+    from app.domain.models import ModelConfig
+
+    with Container.db().session_scope() as session:
+        session.get(ModelConfig, uuid.UUID(entity_id)).params = params
+
+
+def test_get_by_id_revalidates_with_etag(client):
+    created = create_model_config(client)
+    url = f"/model_config/{created['id']}"
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # 字段投影是另一种表示,ETag 不同
+    assert client.get(url, params={"fields": "name"}).headers["ETag"] != etag
+
+    update_model_config(created["id"], {"layers": 4})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["params"] == {"layers": 4}
+
+
+def test_list_revalidates_with_etag(client):
+    create_model_config(client)
+    etag = client.get("/model_config/").headers["ETag"]
+    assert client.get("/model_config/", headers={"If-None-Match": etag}).status_code == 304
+    create_model_config(client, "qwen")
+    response = client.get("/model_config/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_conditional_get_unknown_id_returns_404(client):
+    response = client.get(f"/model_config/{uuid.uuid4()}", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 404
+
+
+def test_run_returns_task_with_configs(client, monkeypatch):
+    from app.services import inference_sim_task
+
+    monkeypatch.setattr(inference_sim_task.run_task, "apply_async", lambda args, task_id: None)
+    created = client.post("/inference_sim_tasks/create", json={
+        "name": "task",
+        "model_config_": {"name": "task-model", "type": "llm"},
+        "system_config": {"name": "task-system", "type": "gpu"},
+        "runtime_config": {"name": "task-runtime"},
+    }).json()
+    response = client.post(f"/inference_sim_tasks/run/{created['id']}")
+    assert response.status_code == 200
+    assert response.json()["celery_task_id"]
+    assert response.json()["model_config_"]["name"] == "task-model"
@@ -0,0 +1,30 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import load_config
+from app.core.settings import DatabaseSettings, LoaderStrategy
+
+
+def test_local_profile_overrides_celery_and_engine(env):
+    env.setenv("APP_PROFILE", "local")
+    config = load_config()
+    # 进程内 worker 不单独启动 /metrics 服务
+    assert config["celery"]["metrics_port"] == 0
+    assert config["celery"]["worker_pool"] == "threads"
+    assert config["engine"]["backend"] == "local"
+    assert "metrics_port" not in config["engine"]
+
+
+def test_default_profile_keeps_worker_metrics_port(env):
+    env.setenv("APP_PROFILE", "default")
+    config = load_config()
+    assert config["celery"]["metrics_port"] == 9808
+    assert config["engine"]["backend"] == "docker"
+
+
+def test_loader_strategy_defaults_match_config(env):
+    assert load_config()["db"]["loader_strategy"] == DatabaseSettings.model_fields["loader_strategy"].default
+    env.setenv("DB_LOADER_STRATEGY", "selectin")
+    assert DatabaseSettings(**load_config()["db"]).loader_strategy is LoaderStrategy.SELECTIN
+    with pytest.raises(ValidationError):
+        DatabaseSettings(url="sqlite://", echo=False, loader_strategy="eager")
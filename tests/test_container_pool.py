@@ -0,0 +1,439 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from executor_backends import FakeBackend, FakeWorker, LocalProcessBackend, OutputBuffer, terminate_process_group
+from processor_client import AutoscalePolicy, ContainerConfig, ContainerPool, JSONProcessor
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend(exec_seconds=0.01)
+
+
+@pytest.fixture
+def pool(backend, tmp_path):
+    pool = ContainerPool(ContainerConfig(max_containers=3), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    yield pool
+    pool.shutdown()
+
+
+def wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class CountingBackend(FakeBackend):
+    """统计 is_running 调用次数；start_delay 时 start 事件延迟发出"""
+
+    def __init__(self, start_delay=0.0, start_action="start", **kwargs):
+        super().__init__(**kwargs)
+        self.start_delay = start_delay
+        self.start_action = start_action
+        self.is_running_calls = 0
+
+    def start_worker(self, labels):
+        if not self.start_delay and self.start_action == "start":
+            return super().start_worker(labels)
+        worker = FakeWorker(labels=dict(labels))
+        worker.running = self.start_action == "start"
+        with self._lock:
+            self._workers[worker.id] = worker
+        threading.Timer(self.start_delay, self._emit, args=(worker, self.start_action)).start()
+        return worker
+
+    def is_running(self, worker):
+        self.is_running_calls += 1
+        return super().is_running(worker)
+
+
+def test_warm_up_fills_pool(pool):
+    wait_for(lambda: len(pool.idle_containers) == 3)
+
+
+def test_readiness_comes_from_start_event(tmp_path):
+    backend = CountingBackend(start_delay=0.05)
+    pool = ContainerPool(ContainerConfig(max_containers=2), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        wait_for(lambda: len(pool.idle_containers) == 2)
+        # 就绪由 start 事件唤醒，没有轮询后端
+        assert backend.is_running_calls == 0
+    finally:
+        pool.shutdown()
+
+
+def test_exit_during_startup_fails_without_waiting_for_timeout(tmp_path):
+    backend = CountingBackend(start_delay=0.05, start_action="die")
+    config = ContainerConfig(max_containers=1, max_retries=0, start_timeout=30)
+    pool = ContainerPool(config, str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="exited during startup"):
+            pool._create_container()
+        assert time.monotonic() - start < 5
+    finally:
+        pool.shutdown()
+
+
+def test_readiness_falls_back_to_is_running_without_events(tmp_path):
+    backend = CountingBackend(supports_events=False)
+    pool = ContainerPool(ContainerConfig(max_containers=2), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        wait_for(lambda: len(pool.idle_containers) == 2)
+        assert backend.is_running_calls == 2
+    finally:
+        pool.shutdown()
+
+
+def test_acquire_prefers_most_recently_released(pool):
+    wait_for(lambda: len(pool.idle_containers) == 3)
+    first = pool.acquire_container()
+    pool.release_container(first)
+    for _ in range(5):
+        container = pool.acquire_container()
+        assert container.id == first.id
+        pool.release_container(container)
+
+
+def test_idle_cleanup_removes_only_expired_tail(backend, tmp_path):
+    config = ContainerConfig(max_containers=4, idle_timeout=60)
+    pool = ContainerPool(config, str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        wait_for(lambda: len(pool.idle_containers) == 4)
+        held = [pool.acquire_container() for _ in range(4)]
+        for container in held[:3]:
+            pool.release_container(container)
+        # 左端为最久未用：held[0]、held[1] 已超时，held[2] 刚归还，held[3] 仍在使用
+        for container in (held[0], held[1]):
+            pool.container_timestamps[container.id] -= 120
+        assert [c.id for c in pool.idle_containers] == [c.id for c in held[:3]]
+
+        assert pool._cleanup_idle_containers() == 2
+        assert [c.id for c in pool.idle_containers] == [held[2].id]
+        assert held[3].id in pool.active_containers
+        # 后续获取复用最近归还的容器
+        assert pool.acquire_container().id == held[2].id
+    finally:
+        pool.shutdown()
+
+
+def test_exited_container_is_discarded(pool, backend):
+    wait_for(lambda: len(pool.idle_containers) == 3)
+    container = pool.acquire_container()
+    backend.fail_worker(container, "oom")
+    wait_for(lambda: not pool._is_running(container))
+    pool.release_container(container)
+    assert container.id not in {c.id for c in pool.idle_containers}
+    assert container.id not in pool.active_containers
+
+
+def test_acquire_and_release_use_in_memory_health(tmp_path):
+    backend = CountingBackend()
+    pool = ContainerPool(ContainerConfig(max_containers=2), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        wait_for(lambda: len(pool.idle_containers) == 2)
+        for _ in range(20):
+            pool.release_container(pool.acquire_container())
+        assert backend.is_running_calls == 0
+
+        # 健康检查失败的事件让容器在获取时被跳过并移出池
+        unhealthy = pool.idle_containers[-1]
+        backend._emit(unhealthy, "health_status: unhealthy")
+        wait_for(lambda: not pool._is_running(unhealthy))
+        container = pool.acquire_container()
+        assert container.id != unhealthy.id
+        assert unhealthy.id not in {c.id for c in pool.idle_containers}
+        assert backend.is_running_calls == 0
+    finally:
+        pool.shutdown()
+
+
+def test_reconcile_corrects_missed_exit_events(pool, backend):
+    wait_for(lambda: len(pool.idle_containers) == 3)
+    container = pool.idle_containers[-1]
+    # 容器退出但事件丢失
+    container.running = False
+    assert pool._is_running(container)
+    pool._reconcile()
+    assert not pool._is_running(container)
+    assert pool.acquire_container().id != container.id
+
+
+def test_acquire_waits_for_release(pool):
+    wait_for(lambda: len(pool.idle_containers) == 3)
+    held = [pool.acquire_container() for _ in range(3)]
+    threading.Timer(0.05, pool.release_container, args=(held[0],)).start()
+    assert pool.acquire_container(timeout=2).id == held[0].id
+    with pytest.raises(TimeoutError):
+        pool.acquire_container(timeout=0.05)
+
+
+def test_cancel_job_kills_running_exec(backend, pool):
+    backend.exec_seconds = 10
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(pool.process_config("config.json", job_id="job-1")))
+    thread.start()
+    wait_for(lambda: "job-1" in pool.running_jobs)
+    assert pool.cancel_job("job-1")
+    thread.join(timeout=2)
+    assert result["exit_code"] != 0
+    assert backend.executed[-1][1][-4:] == ["-c", "/fake/input/config.json", "-o", "/fake/output/out.json"]
+
+
+class Interrupted(BaseException):
+    """模拟在执行线程内抛出的 SoftTimeLimitExceeded/KeyboardInterrupt"""
+
+
+def process_group_exists(pgid):
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_interrupted_local_exec_terminates_process_group(tmp_path):
+    backend = LocalProcessBackend(str(tmp_path / "in"), str(tmp_path / "out"))
+    # 引擎及其派生的子进程都在同一个进程组内
+    script = "import os, subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); print(os.getpid(), flush=True); time.sleep(60)"
+    pids = []
+
+    def on_line(stream, line):
+        pids.append(int(line))
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        backend.exec(None, [sys.executable, "-c", script], "job-1", on_line=on_line)
+    # 派生的子进程由 init 回收，稍后才从进程组中消失
+    wait_for(lambda: not process_group_exists(pids[0]))
+    # 中断后的 kill 是空操作
+    backend.kill(None, "job-1")
+
+
+def test_terminate_process_group_falls_back_to_sigkill():
+    process = subprocess.Popen(
+        [sys.executable, "-c", "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(flush=True); time.sleep(60)"],
+        stdout=subprocess.PIPE, start_new_session=True,
+    )
+    process.stdout.readline()
+    start = time.monotonic()
+    terminate_process_group(process, timeout=0.2)
+    assert process.returncode == -9
+    assert time.monotonic() - start < 5
+    process.stdout.close()
+
+
+def test_server_mode_reuses_session(tmp_path):
+    backend = FakeBackend(exec_seconds=0.01, supports_sessions=True)
+    pool = ContainerPool(ContainerConfig(max_containers=1), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        for i in range(3):
+            assert pool.process_config("config.json", f"out{i}.json")["exit_code"] == 0
+        assert len(backend.sessions) == 1
+        assert [request["output"] for _, request in backend.requests] == [f"/fake/output/out{i}.json" for i in range(3)]
+        assert backend.executed == []
+    finally:
+        pool.shutdown()
+    assert backend.sessions[0].closed.is_set()
+
+
+def test_session_skips_non_protocol_output(tmp_path):
+    # 引擎或依赖库误写到 stdout 的行不影响会话
+    noise = [b"DeprecationWarning: something", b"42", b'{"unrelated": true}', b'{"id": "other", "exit_code": 1}']
+    backend = FakeBackend(supports_sessions=True, session_noise=noise, output=b"done")
+    pool = ContainerPool(ContainerConfig(max_containers=1), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        for _ in range(2):
+            result = pool.process_config("config.json")
+            assert (result["exit_code"], result["output"]) == (0, "done")
+        assert len(backend.sessions) == 1
+        assert backend.executed == []
+    finally:
+        pool.shutdown()
+
+
+def test_cancel_job_closes_session(tmp_path):
+    backend = FakeBackend(exec_seconds=10, supports_sessions=True)
+    pool = ContainerPool(ContainerConfig(max_containers=1), str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(pool.process_config("config.json", job_id="job-1")))
+        thread.start()
+        wait_for(lambda: backend.requests)
+        assert pool.cancel_job("job-1")
+        thread.join(timeout=2)
+        assert result["exit_code"] == -15
+        assert backend.executed == []
+        # 下一个任务重新建立会话
+        backend.exec_seconds = 0
+        assert pool.process_config("config.json")["exit_code"] == 0
+        assert len(backend.sessions) == 2
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("server_mode", [False, True])
+def test_process_batch_packs_configs(tmp_path, server_mode):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    for i in range(20):
+        (input_dir / f"c{i}.json").write_text(json.dumps({"i": i}))
+    processor = JSONProcessor(
+        str(input_dir), str(output_dir), ContainerConfig(max_containers=2, server_mode=server_mode),
+        backend=LocalProcessBackend(str(input_dir), str(output_dir)),
+    )
+    try:
+        results = processor.process_batch([f"c{i}.json" for i in range(20)] + ["missing.json"])
+    finally:
+        processor.shutdown()
+    assert [result["config"] for result in results] == [f"c{i}.json" for i in range(20)] + ["missing.json"]
+    assert all(result["exit_code"] == 0 for result in results[:-1])
+    assert results[-1]["exit_code"] == 1
+    assert json.loads((output_dir / "result_7.json").read_text()) == {"i": 7}
+    # 按 max_containers 至少切成 2 批，但远少于每个文件一次执行
+    assert 2 <= len({result["job_id"] for result in results}) <= 4
+    assert not list(input_dir.glob(".batch-*"))
+
+
+@pytest.mark.parametrize("server_mode", [False, True])
+def test_process_batch_reports_progress(tmp_path, server_mode):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    for i in range(6):
+        (input_dir / f"c{i}.json").write_text("{}")
+    processor = JSONProcessor(
+        str(input_dir), str(output_dir), ContainerConfig(max_containers=2, server_mode=server_mode),
+        backend=LocalProcessBackend(str(input_dir), str(output_dir)),
+    )
+    progress = []
+    try:
+        processor.process_batch([f"c{i}.json" for i in range(6)], on_progress=progress.append)
+    finally:
+        processor.shutdown()
+    assert [p["done"] for p in progress] == list(range(1, 7))
+    assert all(p["total"] == 6 for p in progress)
+
+
+def test_output_buffer_is_bounded():
+    progress = []
+
+    def on_line(stream, line):
+        if line.startswith("PROGRESS"):
+            progress.append(line)
+            return True
+        return False
+
+    buffer = OutputBuffer(limit=100, on_line=on_line)
+    for i in range(50):
+        buffer.feed("stdout", f"line {i:02d}\nPROGRESS {i}\n".encode())
+    buffer.feed("stderr", b"error: no newline")
+    value = buffer.getvalue()
+    assert len(progress) == 50
+    assert value.startswith(b"[") and b"truncated" in value.splitlines()[0]
+    assert value.endswith(b"line 49\nerror: no newline")
+    assert len(value) < 150
+
+
+@pytest.mark.parametrize("server_mode", [False, True])
+def test_process_data_stages_in_memory(tmp_path, server_mode):
+    staging = tmp_path / "shm"
+    pool = ContainerPool(
+        ContainerConfig(max_containers=1, server_mode=server_mode, staging_dir=str(staging)),
+        str(tmp_path / "in"), str(tmp_path / "out"),
+        backend=LocalProcessBackend(str(tmp_path / "in"), str(tmp_path / "out")),
+    )
+    try:
+        with pool.process_data({"a": [1, 2, 3]}) as result:
+            assert result.exit_code == 0
+            assert result.json() == {"a": [1, 2, 3]}
+            assert len(list(staging.rglob("*.json"))) == 1
+        assert not list(staging.rglob("*.json"))
+
+        failed = pool.process_data(b"{not json")
+        assert failed.exit_code == 2 and failed.output == b""
+        failed.close()
+        assert not list(staging.rglob("*.json"))
+    finally:
+        pool.shutdown()
+    assert not staging.exists() or not any(staging.iterdir())
+
+
+def test_iter_batch_applies_backpressure(backend, tmp_path):
+    backend.exec_seconds = 0.05
+    processor = JSONProcessor(str(tmp_path / "in"), str(tmp_path / "out"), ContainerConfig(max_containers=2), backend=backend)
+    try:
+        wait_for(lambda: len(processor.container_pool.idle_containers) == 2)
+        results = processor.iter_batch([f"c{i}.json" for i in range(20)], target_seconds=0.001)
+        next(results)
+        time.sleep(0.3)
+        # 生成器暂停时不再提交新的批
+        assert len(backend.executed) <= 4
+        remaining = list(results)
+        assert len(remaining) == 19 and all(result["exit_code"] == 0 for result in remaining)
+    finally:
+        processor.shutdown()
+
+
+def test_process_batch_preserves_order_and_enforces_deadline(backend, tmp_path):
+    processor = JSONProcessor(str(tmp_path / "in"), str(tmp_path / "out"), ContainerConfig(max_containers=2), backend=backend)
+    try:
+        configs = [f"c{i}.json" for i in range(6)]
+        assert [result["config"] for result in processor.process_batch(configs, target_seconds=0.001)] == configs
+
+        backend.exec_seconds = 10
+        start = time.monotonic()
+        results = processor.process_batch(configs[:2], job_timeout=0.2)
+        assert time.monotonic() - start < 2
+        assert all(result["timed_out"] and result["exit_code"] == -15 for result in results)
+    finally:
+        processor.shutdown()
+
+
+def test_autoscale_policy_hysteresis():
+    policy = AutoscalePolicy(ContainerConfig(min_containers=1, max_containers=8, scale_down_delay=60))
+    assert policy.decide(0, 1, busy=1, waiting=3, wait_quantile=None, utilization=1.0) == 4
+    assert policy.decide(10, 4, busy=4, waiting=0, wait_quantile=2.0, utilization=1.0) == 5
+    assert policy.decide(20, 5, busy=5, waiting=0, wait_quantile=2.0, utilization=1.0, host_ok=False) == 5
+    # 低使用率需要持续 scale_down_delay，且距上次扩容也要超过 scale_down_delay
+    assert policy.decide(30, 5, busy=1, waiting=0, wait_quantile=None, utilization=0.2) == 5
+    assert policy.decide(75, 5, busy=1, waiting=0, wait_quantile=None, utilization=0.2) == 5
+    assert policy.decide(95, 5, busy=1, waiting=0, wait_quantile=None, utilization=0.2) == 4
+    assert policy.decide(100, 4, busy=1, waiting=0, wait_quantile=None, utilization=0.2) == 4
+    assert policy.decide(160, 4, busy=0, waiting=0, wait_quantile=None, utilization=0.0) == 3
+    assert not AutoscalePolicy(ContainerConfig(max_containers=3)).enabled
+
+
+def test_pool_scales_with_demand(backend, tmp_path):
+    backend.exec_seconds = 0.05
+    config = ContainerConfig(
+        min_containers=1, max_containers=4, scale_interval=0.05, scale_down_delay=0.2,
+        max_host_memory_percent=100, max_host_load=float("inf"),
+    )
+    pool = ContainerPool(config, str(tmp_path / "in"), str(tmp_path / "out"), backend=backend)
+    try:
+        wait_for(lambda: len(pool.idle_containers) == 1)
+        stop = threading.Event()
+
+        def load():
+            while not stop.is_set():
+                pool.process_config("config.json")
+
+        threads = [threading.Thread(target=load, daemon=True) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            wait_for(lambda: pool._target == 4)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        wait_for(lambda: pool._target == 1 and len(pool.idle_containers) + len(pool.active_containers) == 1, timeout=5)
+    finally:
+        pool.shutdown()
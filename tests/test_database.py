@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, event
+
+from app.core.database import Database, SchemaDriftError
+from app.core.settings import DatabaseSettings
+
+
+def make_metadata(*extra_columns):
+    metadata = MetaData()
+    Table("items", metadata, Column("id", Integer, primary_key=True), Column("name", String(50)), *extra_columns)
+    return metadata
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(DatabaseSettings(url=f"sqlite:///{tmp_path / 'test.db'}", echo=False))
+
+
+def count_statements(db):
+    statements = []
+    event.listen(db._engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_ensure_schema_creates_tables_then_takes_fast_path(db):
+    metadata = make_metadata()
+    assert db.ensure_schema(metadata)
+    assert db.schema_version() is not None
+
+    statements = count_statements(db)
+    assert not db.ensure_schema(metadata)
+    # 版本一致时只有一次主键查询
+    assert len(statements) == 1
+    assert "schema_version" in statements[0]
+
+
+def test_ensure_schema_adds_new_tables(db):
+    db.ensure_schema(make_metadata())
+    metadata = make_metadata()
+    Table("tags", metadata, Column("id", Integer, primary_key=True))
+    assert db.ensure_schema(metadata)
+    with db._engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM tags").scalar() == 0
+
+
+def test_ensure_schema_refuses_missing_columns(db):
+    db.ensure_schema(make_metadata())
+    version = db.schema_version()
+    with pytest.raises(SchemaDriftError) as excinfo:
+        db.ensure_schema(make_metadata(Column("celery_task_id", String(64))))
+    assert excinfo.value.missing == {"items": ["celery_task_id"]}
+    # 版本不变,下次启动仍会检查
+    assert db.schema_version() == version
@@ -0,0 +1,35 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "engine"))
+
+from json_io import stream_reformat  # noqa: E402
+
+DOCUMENTS = [
+    "{}",
+    '{"a": []}',
+    '[1, -0, 1.5e3, "\\u00e9\\/", true, null, NaN, {"k": {"x": [[], {}]}}]',
+    '  {"database": {"host": "localhost", "port": 5432}, "debug": true}  ',
+    '"s"',
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_stream_reformat_matches_json_dump(document, compact, chunk_size):
+    output = io.StringIO()
+    stream_reformat(io.StringIO(document), output, compact=compact, chunk_size=chunk_size)
+    data = json.loads(document)
+    expected = json.dumps(data, separators=(",", ":")) if compact else json.dumps(data, indent=4)
+    assert output.getvalue() == expected
+
+
+@pytest.mark.parametrize("document", ["", "{", "[1,]", '{"a" 1}', "[1 2]", "[1] 2", "[01]", '{"a":1]'])
+def test_stream_reformat_rejects_invalid_json(document):
+    with pytest.raises(json.JSONDecodeError):
+        stream_reformat(io.StringIO(document), io.StringIO(), chunk_size=2)
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.worker import engine_pool
+
+
+@pytest.fixture
+def settings(tmp_path):
+    yield {"backend": "local", "work_dir": str(tmp_path / "work")}
+    engine_pool.shutdown_pool()
+
+
+def test_pool_size_follows_tasks_per_process(settings, monkeypatch):
+    monkeypatch.setattr(engine_pool, "engine_settings", lambda: settings)
+    # prefork 子进程一次只执行一个任务,主进程不创建池
+    engine_pool.configure_engine_pool(SimpleNamespace(pool_cls="prefork", concurrency=8))
+    assert engine_pool._pool is None
+    engine_pool.start_process_engine_pool()
+    assert engine_pool.get_pool().config.max_containers == 1
+    engine_pool.shutdown_pool()
+
+    # threads 池在主进程内并发执行 concurrency 个任务
+    engine_pool.configure_engine_pool(SimpleNamespace(pool_cls="threads", concurrency=3))
+    assert engine_pool.get_pool().config.max_containers == 3
+
+
+def test_run_configs_processes_configs_in_one_job(settings, tmp_path):
+    pool = engine_pool.init_pool(1, settings)
+    progress = []
+    outputs = engine_pool.run_configs(
+        "task-1", {"model_config": {"layers": 2}, "system_config": {"gpus": 8}}, progress.append,
+    )
+    assert outputs["model_config"]["exit_code"] == 0
+    assert outputs["model_config"]["result"] == {"layers": 2}
+    assert outputs["system_config"]["result"] == {"gpus": 8}
+    assert [message["config"] for message in progress] == ["model_config", "system_config"]
+    # 输入与输出在任务结束后删除
+    assert not (tmp_path / "work" / "input" / "task-1").exists()
+    assert not (tmp_path / "work" / "output" / "task-1").exists()
+    assert pool.config.max_containers == 1
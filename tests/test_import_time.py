@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.import_time import BUDGETS, FORBIDDEN_IMPORTS, budget_scale, measure
+
+
+@pytest.mark.parametrize("module", sorted(FORBIDDEN_IMPORTS))
+def test_entry_module_does_not_import_heavy_dependencies(module):
+    _, times = measure(module, runs=1)
+    imported = [name for name in FORBIDDEN_IMPORTS[module] if name in times]
+    assert not imported, f"importing {module} also imports {imported}"
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_entry_module_import_time_within_budget(module):
+    total_ms, times = measure(module)
+    budget_ms = BUDGETS[module] * budget_scale()
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)[1:6]
+    assert total_ms <= budget_ms, (
+        f"importing {module} took {total_ms:.1f} ms, budget is {budget_ms:.0f} ms; "
+        f"slowest: {[(name, round(cumulative / 1e3, 1)) for name, (_, cumulative) in slowest]}"
+    )
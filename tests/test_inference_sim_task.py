@@ -0,0 +1,87 @@
+from unittest.mock import Mock
+
+import pytest
+
+from app.domain.models import (
+    InferenceRuntimeConfigCreate,
+    InferenceSimTaskCreate,
+    ModelConfigCreate,
+    SimTaskStatusEnum,
+    SystemConfigCreate,
+)
+
+
+@pytest.fixture
+def service(env, session):
+    from app.services.inference_sim_task import InferenceSimTaskService
+
+    return InferenceSimTaskService.create_instance(session)
+
+
+@pytest.fixture
+def revoke(service, monkeypatch):
+    from app.services import inference_sim_task
+
+    revoke = Mock()
+    monkeypatch.setattr(inference_sim_task.celery_app.control, "revoke", revoke)
+    return revoke
+
+
+def create_task(service, name="task"):
+    return service.create(InferenceSimTaskCreate(
+        name=name,
+        model_config_=ModelConfigCreate(name=f"{name}-model", type="llm"),
+        system_config=SystemConfigCreate(name=f"{name}-system", type="gpu"),
+        runtime_config=InferenceRuntimeConfigCreate(name=f"{name}-runtime"),
+    ))
+
+
+def test_cancel_revokes_running_task_and_keeps_cancelled(service, revoke):
+    from app.services.inference_sim_task import REVOKE_SIGNAL
+
+    task = create_task(service)
+    task.celery_task_id = "celery-1"
+    assert service.start(task.id) is not None
+
+    assert service.cancel(task.id).status == SimTaskStatusEnum.CANCELLED
+    revoke.assert_called_once_with(["celery-1"], terminate=True, signal=REVOKE_SIGNAL)
+
+    # 运行中的任务被终止后仍会上报结果,取消状态不被覆盖
+    finished = service.finish(task.id, SimTaskStatusEnum.FAILED, {"error": "terminated"})
+    assert finished.status == SimTaskStatusEnum.CANCELLED
+    assert finished.result == {"error": "terminated"}
+    # 已取消的任务不会再开始执行
+    assert service.start(task.id) is None
+
+
+def test_cancel_batch_skips_finished_tasks(service, revoke):
+    pending, running, completed = (create_task(service, name) for name in ("pending", "running", "completed"))
+    running.celery_task_id = "celery-running"
+    completed.celery_task_id = "celery-completed"
+    service.finish(completed.id, SimTaskStatusEnum.COMPLETED, {})
+
+    tasks = service.cancel_batch([pending.id, running.id, completed.id])
+    assert [task.status for task in tasks if task.id != completed.id] == [SimTaskStatusEnum.CANCELLED] * 2
+    assert completed.status == SimTaskStatusEnum.COMPLETED
+    # 一次广播撤销,只包含已提交且未结束的任务
+    revoke.assert_called_once()
+    assert revoke.call_args.args[0] == ["celery-running"]
+
+
+def test_run_commits_celery_task_id_before_publishing(service, session, monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from app.domain.models import InferenceSimTask
+    from app.services import inference_sim_task
+
+    task = create_task(service)
+    published = []
+
+    def apply_async(args, task_id):
+        # 发布时另一个连接(worker 或取消请求)已经能读到 celery_task_id
+        with Session(session.get_bind()) as other:
+            published.append((task_id, other.get(InferenceSimTask, task.id).celery_task_id))
+
+    monkeypatch.setattr(inference_sim_task.run_task, "apply_async", apply_async)
+    assert service.run(task.id).celery_task_id == published[0][0]
+    assert published[0][1] == published[0][0]
@@ -0,0 +1,19 @@
+from celery.bootsteps import RUN
+
+
+def test_in_process_worker_runs_tasks_and_shuts_down_engine_pool(env, tmp_path):
+    env.setenv("ENGINE_BACKEND", "local")
+    env.setenv("ENGINE_WORK_DIR", str(tmp_path / "work"))
+    env.setenv("CELERY_METRICS_PORT", "0")
+    from app.worker import engine_pool
+    from app.worker.local import in_process_worker
+    from app.worker.tasks import add
+
+    with in_process_worker(concurrency=2) as worker:
+        # worker_init 按 threads 池的并发数创建进程内的引擎池
+        assert engine_pool._pool.config.max_containers == 2
+        # API 与 worker 同进程,可以阻塞等待结果
+        assert add.delay(1, 2).get(timeout=10) == 3
+    # 退出时发送 worker_shutdown,引擎池随之关闭
+    assert engine_pool._pool is None
+    assert worker.blueprint.state != RUN
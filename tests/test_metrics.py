@@ -0,0 +1,66 @@
+import pytest
+
+from app.core.metrics import CONTENT_TYPE, MetricsRegistry
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("method",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    requests.inc("GET")
+    requests.inc("GET", amount=2)
+    in_flight.set(value=3)
+    for value in (0.05, 0.5, 2.0):
+        latency.observe(value, '/a"b')
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET"} 3.0',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 3.0",
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        # 分桶计数是累计值,标签值中的引号被转义
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a\\"b",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a\\"b"} 2.55',
+        'latency_seconds_count{route="/a\\"b"} 3',
+    ]
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    latency = MetricsRegistry().histogram("latency_seconds", "Latency", buckets=(1.0, 2.0))
+    assert latency.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 1.5):
+        latency.observe(value)
+    assert latency.quantile(0.5) == pytest.approx(1.0 + 1.0 / 3)
+    since = latency.snapshot()
+    latency.observe(5.0)
+    # 只统计 since 之后的样本,落在 +Inf 分桶时返回最大的有限上界
+    assert latency.quantile(0.5, since=since) == 2.0
+
+
+def test_register_reuses_existing_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("hits_total", "Hits") is registry.counter("hits_total", "Hits")
+    with pytest.raises(AssertionError):
+        registry.gauge("hits_total", "Hits")
+
+
+def test_requests_are_recorded_by_route_template(client):
+    from app.api.middleware import REQUEST_LATENCY
+
+    before = REQUEST_LATENCY.snapshot("GET", "/model_config/{entity_id}", "404")
+    response = client.get("/model_config/00000000-0000-0000-0000-000000000000")
+    assert response.status_code == 404
+    assert response.headers["Server-Timing"].startswith("app;dur=")
+    after = REQUEST_LATENCY.snapshot("GET", "/model_config/{entity_id}", "404")
+    assert sum(after) - sum(before) == 1
+
+    response = client.get("/metrics")
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    assert 'http_request_duration_seconds_count{method="GET",route="/model_config/{entity_id}",status="404"}' in response.text
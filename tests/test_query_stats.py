@@ -0,0 +1,69 @@
+import logging
+import re
+
+from sqlalchemy import create_engine, text
+
+from app.core.query_stats import QueryStats, instrument_engine, statement_shape, track_queries
+
+
+def test_statement_shape_normalizes_whitespace_and_in_lists():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    # 重复注册不会重复计数
+    instrument_engine(engine)
+    with engine.connect() as connection, track_queries() as stats:
+        connection.execute(text("SELECT 1"))
+        for i in range(3):
+            connection.execute(text("SELECT :i"), {"i": i})
+        with track_queries() as inner:
+            connection.execute(text("SELECT 2"))
+    # 内层作用域的查询不计入外层
+    assert inner.count == 1
+    assert stats.count == 4
+    assert stats.repeated() == [("SELECT ?", 3)]
+
+    with caplog.at_level(logging.INFO, logger="app.core.query_stats"):
+        stats.log("request", "GET /items")
+    record = caplog.records[-1]
+    assert record.levelno == logging.WARNING
+    assert record.db_queries == 4
+    assert record.n_plus_one == [{"statement": "SELECT ?", "count": 3}]
+
+
+def test_requests_without_repeats_log_only_at_debug(caplog):
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.001)
+    with caplog.at_level(logging.INFO, logger="app.core.query_stats"):
+        stats.log("request", "GET /items")
+    assert not caplog.records
+    with caplog.at_level(logging.DEBUG, logger="app.core.query_stats"):
+        stats.log("request", "GET /items")
+    assert caplog.records[-1].levelno == logging.DEBUG
+
+
+def test_queries_outside_scope_are_not_tracked():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with track_queries() as stats:
+        pass
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert stats.count == 0
+
+
+def test_server_timing_includes_db_entry(client):
+    created = client.post("/model_config/create", json={"name": "llama", "type": "llm"}).json()
+    response = client.get(f"/model_config/{created['id']}")
+    match = re.search(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers["Server-Timing"])
+    assert match and int(match.group(2)) >= 1
+
+
+def test_server_timing_format():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.0015)
+    assert stats.server_timing() == 'db;dur=1.500;desc="1 queries"'
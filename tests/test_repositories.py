@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app.core.query_stats import track_queries
+from app.core.settings import LoaderStrategy
+from app.domain.models import InferenceRuntimeConfig, InferenceSimTask, ModelConfig, SystemConfig
+from app.repositories.inference_sim_task import InferenceSimTaskRepository
+
+
+@pytest.fixture
+def repository(session):
+    for i in range(3):
+        model_config_ = ModelConfig(name=f"model-{i}", type="llm")
+        system_config = SystemConfig(name=f"system-{i}", type="gpu")
+        runtime_config = InferenceRuntimeConfig(name=f"runtime-{i}")
+        session.add(InferenceSimTask(
+            name=f"task-{i}",
+            model_config_=model_config_,
+            system_config=system_config,
+            runtime_config=runtime_config,
+        ))
+    session.flush()
+    # 之后的读取都从数据库加载
+    session.expunge_all()
+    return InferenceSimTaskRepository(session)
+
+
+def load_relations(tasks):
+    return sorted((task.model_config_.name, task.system_config.name, task.runtime_config.name) for task in tasks)
+
+
+def test_raise_forbids_lazy_loads(repository):
+    task = repository.get_all(loader_strategy=LoaderStrategy.RAISE)[0]
+    with pytest.raises(InvalidRequestError):
+        task.model_config_
+
+
+@pytest.mark.parametrize("loader_strategy, expected_queries", [
+    # 每条记录的每个关系各一条查询
+    (LoaderStrategy.LAZY, 1 + 3 * 3),
+    # 每个关系一条 SELECT ... IN,与记录数无关
+    (LoaderStrategy.SELECTIN, 1 + 3),
+    (LoaderStrategy.JOINED, 1),
+])
+def test_loader_strategy_query_counts(repository, loader_strategy, expected_queries):
+    with track_queries() as stats:
+        tasks = repository.get_all(loader_strategy=loader_strategy)
+        relations = load_relations(tasks)
+    assert relations == [(f"model-{i}", f"system-{i}", f"runtime-{i}") for i in range(3)]
+    assert stats.count == expected_queries
+
+
+def test_repository_default_strategy_applies_to_get_by_id(session, repository):
+    task_id = repository.get_all()[0].id
+    session.expunge_all()
+    repository = InferenceSimTaskRepository(session, LoaderStrategy.JOINED)
+    with track_queries() as stats:
+        load_relations([repository.get_by_id(task_id)])
+    assert stats.count == 1
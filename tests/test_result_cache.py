@@ -0,0 +1,50 @@
+import json
+
+from executor_backends import LocalProcessBackend
+from processor_client import ContainerConfig, JSONProcessor
+from result_cache import ResultCache
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        cache.store(name * 64, str(tmp_path / name))
+    assert cache.stats()["entries"] == 2
+    assert not cache.fetch("a" * 64, str(tmp_path / "out"))
+    assert cache.fetch("b" * 64, str(tmp_path / "out"))
+
+    (tmp_path / "d").write_bytes(b"x" * 100)
+    cache.store("d" * 64, str(tmp_path / "d"))
+    # b 刚被使用，淘汰的是 c
+    assert cache.fetch("b" * 64, str(tmp_path / "out"))
+    assert not cache.fetch("c" * 64, str(tmp_path / "out"))
+
+    reopened = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    assert reopened.stats()["entries"] == 2
+
+
+def test_processor_serves_unchanged_configs_from_cache(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    for i in range(4):
+        (input_dir / f"c{i}.json").write_text(json.dumps({"i": i}))
+    cache = ResultCache(str(tmp_path / "cache"))
+    processor = JSONProcessor(
+        str(input_dir), str(output_dir), ContainerConfig(max_containers=2),
+        backend=LocalProcessBackend(str(input_dir), str(output_dir)), result_cache=cache,
+    )
+    configs = [f"c{i}.json" for i in range(4)]
+    try:
+        first = processor.process_batch(configs)
+        (input_dir / "c3.json").write_text(json.dumps({"i": "changed"}))
+        second = processor.process_batch(configs)
+        single = processor.process_config("c0.json", "single.json")
+    finally:
+        processor.shutdown()
+    assert not any(result.get("cached") for result in first)
+    assert [result.get("cached", False) for result in second] == [True, True, True, False]
+    assert single["cached"]
+    assert json.loads((output_dir / "result_3.json").read_text()) == {"i": "changed"}
+    assert json.loads((output_dir / "single.json").read_text()) == {"i": 0}
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 5
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from celery import signals
+
+
+@pytest.fixture
+def telemetry(env):
+    from app.worker import telemetry
+
+    return telemetry
+
+
+@pytest.fixture
+def task(telemetry):
+    from app.worker.tasks import add
+
+    return add
+
+
+def test_publish_stamps_wall_clock_time(telemetry, task):
+    published = []
+
+    def capture(headers=None, **kwargs):
+        published.append(dict(headers))
+
+    signals.before_task_publish.connect(capture, weak=False)
+    try:
+        before = time.time()
+        task.delay(1, 2)
+    finally:
+        signals.before_task_publish.disconnect(capture)
+    assert before <= published[0][telemetry.PUBLISHED_AT_HEADER] <= time.time()
+
+
+def test_prerun_records_queue_wait_separately_from_execution(telemetry, task):
+    queue_wait_before = telemetry.TASK_QUEUE_WAIT.snapshot(task.name)
+    execution_before = telemetry.TASK_EXECUTION.snapshot(task.name, "SUCCESS")
+    # worker 把消息头合并进 task.request,这里按同样的形态模拟一条排队 2 秒的任务
+    task.push_request(id="task-1", **{telemetry.PUBLISHED_AT_HEADER: time.time() - 2})
+    try:
+        signals.task_prerun.send(sender=task, task_id="task-1", task=task, args=(), kwargs={})
+        signals.task_postrun.send(sender=task, task_id="task-1", task=task, args=(), kwargs={}, retval=3, state="SUCCESS")
+    finally:
+        task.pop_request()
+
+    since = telemetry.TASK_QUEUE_WAIT.snapshot(task.name)
+    waited = [after - before for after, before in zip(since, queue_wait_before)]
+    # 2 秒落在 (1, 5] 分桶
+    assert waited[telemetry.TASK_BUCKETS.index(5.0)] == 1 and sum(waited) == 1
+    executed = [after - before for after, before in zip(telemetry.TASK_EXECUTION.snapshot(task.name, "SUCCESS"), execution_before)]
+    assert executed[0] == 1 and sum(executed) == 1
+    assert "task-1" not in telemetry._running_tasks
+
+
+def test_failures_are_counted_by_exception_type(telemetry, task):
+    before = telemetry.TASK_FAILURES.value(task.name, "ValueError")
+    signals.task_failure.send(sender=task, task_id="task-2", exception=ValueError("boom"))
+    assert telemetry.TASK_FAILURES.value(task.name, "ValueError") == before + 1